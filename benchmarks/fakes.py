@@ -0,0 +1,284 @@
+"""
+Benchmark 用的離線替身 (Fakes)：
+- ChatGroq: 在 API 邊界 (_generate / _agenerate / _stream / _astream) 攔截，可設定延遲與腳本化的經理審核分數
+- yf.Ticker / yf.download: 讀取 fixtures/ 內錄好的歷史股價與基本面
+- search_tool (DuckDuckGoSearchResults): 固定延遲、固定內容，可模擬整個來源斷線
+限速、快取、遙測等真實程式碼路徑仍然會被執行。
+"""
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+import pandas as pd
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_groq import ChatGroq
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class CallCounter:
+    """各外部來源的呼叫次數"""
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def hit(self, source):
+        with self._lock:
+            self._counts[source] = self._counts.get(source, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(sorted(self._counts.items()))
+
+
+class FakeTicker:
+    """以 fixture 模擬 yf.Ticker；不同 symbol 依名稱做固定的價格縮放"""
+    counter = None
+    fixture = "SAMPLE"
+    latency = 0.0
+    _cache = {}
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self._scale = 0.5 + (zlib.crc32(ticker.encode()) % 100) / 50
+
+    @classmethod
+    def _load(cls):
+        if cls.fixture not in cls._cache:
+            hist = pd.read_csv(os.path.join(FIXTURE_DIR, f"{cls.fixture}_history.csv"),
+                               index_col="Date", parse_dates=True)
+            with open(os.path.join(FIXTURE_DIR, f"{cls.fixture}_info.json"), encoding="utf-8") as f:
+                snapshot = json.load(f)
+            cls._cache[cls.fixture] = (hist, snapshot)
+        return cls._cache[cls.fixture]
+
+    def _hit(self, source):
+        if self.counter:
+            self.counter.hit(source)
+        time.sleep(self.latency)
+
+    def history(self, period="1mo", start=None, **kwargs):
+        self._hit("yfinance.history")
+        hist, _ = self._load()
+        hist = hist.copy()
+        hist[["Open", "High", "Low", "Close"]] *= self._scale
+        if start is not None:
+            return hist.loc[hist.index >= pd.Timestamp(start)]
+        return hist
+
+    @property
+    def info(self):
+        self._hit("yfinance.info")
+        info = dict(self._load()[1]["info"])
+        info["currentPrice"] = round(info["currentPrice"] * self._scale, 2)
+        return info
+
+    @property
+    def institutional_holders(self):
+        self._hit("yfinance.holders")
+        return pd.DataFrame(self._load()[1]["institutional_holders"])
+
+    @property
+    def major_holders(self):
+        self._hit("yfinance.holders")
+        return pd.DataFrame(self._load()[1]["major_holders"])
+
+
+def fake_download(tickers, period=None, start=None, group_by="ticker", **kwargs):
+    """以 FakeTicker 組出 yf.download 的多檔寬表 (欄位為 symbol, OHLCV)，整批只算一次呼叫"""
+    if FakeTicker.counter:
+        FakeTicker.counter.hit("yfinance.download")
+    time.sleep(FakeTicker.latency)
+    frames = {}
+    for ticker in tickers:
+        hist, _ = FakeTicker._load()
+        hist = hist.copy()
+        hist[["Open", "High", "Low", "Close"]] *= FakeTicker(ticker)._scale
+        if start is not None:
+            hist = hist.loc[hist.index >= pd.Timestamp(start)]
+        frames[ticker] = hist
+    return pd.concat(frames, axis=1)
+
+
+class FakeSearch:
+    """DuckDuckGoSearchResults 替身"""
+    counter = None
+    latency = 0.0
+    down = False
+
+    def run(self, query):
+        if self.counter:
+            self.counter.hit("ddg")
+        time.sleep(self.latency)
+        if self.down:
+            raise ConnectionError("DuckDuckGo unreachable (simulated outage)")
+        return (f"snippet: {query} rose 12% YoY while margins compressed to 6.4%, "
+                f"title: {query}, link: https://www.samplemotors.com/ir") * 5
+
+    async def arun(self, query):
+        return await asyncio.to_thread(self.run, query)
+
+
+class FakeGroq:
+    """
+    取代 ChatGroq 的網路呼叫。
+    review_scores(n, side) 回傳該方 (bull / bear) 第 n 次 (從 0 開始) 經理審核的分數；
+    回應會依 schema 欄位名稱自動填入 score / feedback / decision。
+    """
+    # 搜尋查詢裡拿來比較的同業 (benchmark batch 情境的 ticker 兩兩一組)
+    PEERS = {"NVDA": "AMD", "AMD": "NVDA", "AVGO": "QCOM", "QCOM": "AVGO",
+             "TSM": "INTC", "INTC": "TSM", "MU": "ARM", "ARM": "MU"}
+
+    def __init__(self, counter, latency=0.0, review_scores=lambda n, side: 92):
+        self.counter = counter
+        self.latency = latency
+        self.review_scores = review_scores
+        self._reviews = {}
+        self._drafts = 0
+        self._lock = threading.Lock()
+
+    def _review_index(self, messages):
+        # 依 ticker (prompt 內容) 分開計數，批次時各檔互不影響；草稿編號不算在內
+        key = zlib.crc32(re.sub(r"#\d+", "", messages[0].content)[:400].encode())
+        with self._lock:
+            n = self._reviews.get(key, 0)
+            self._reviews[key] = n + 1
+            return n
+
+    @classmethod
+    def _search_query(cls, prompt):
+        """
+        像真的模型一樣產生「TICKER vs 同業」的比較查詢。同一組同業兩邊的措辭略有不同
+        (其中一方多一個年份)，只有跨 ticker 的近似比對才能共用結果。
+        """
+        ticker = re.search(r"Ticker: (\S+)", prompt).group(1)
+        peer = cls.PEERS.get(ticker, "sector")
+        year = " 2025" if ticker > peer else ""
+        return f"{ticker} vs {peer} AI chip market share{year}"
+
+    def _result(self, messages, kwargs):
+        self.counter.hit("llm")
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        tools = kwargs.get("tools")
+        if tools:
+            function = tools[0]["function"]
+            args = {}
+            for field in function["parameters"].get("properties", {}):
+                if "score" in field:
+                    # 只有單方審核才有分數；最終結論 (Verdict) 不佔用審核次數
+                    side = re.search(r"Review the (\w+) report", messages[0].content)
+                    args[field] = self.review_scores(self._review_index(messages), side.group(1).lower() if side else None)
+                elif "decision" in field:
+                    args[field] = "Hold: 估值偏高但成長動能仍在。"
+                else:
+                    args[field] = "請補充具體的營收成長與毛利率數據，並說明與估值的因果關係。"
+            message = AIMessage(content="", tool_calls=[{"name": function["name"], "args": args, "id": "call_0"}])
+            completion = 60
+        elif "search query" in str(messages[0].content):
+            message = AIMessage(content=self._search_query(messages[0].content))
+            completion = 12
+        else:
+            # 每份草稿內容都不同 (如同真實的修改)，經理才不會當成沒變動而跳過審核
+            with self._lock:
+                self._drafts += 1
+                text = f"【Fake Report #{self._drafts}】" + "營收年增 12%，毛利率 18%，RSI 55，價格站上 SMA50。" * 8
+            message = AIMessage(content=text)
+            completion = 250
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion}
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"token_usage": usage})
+
+    def generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._result(messages, kwargs)
+
+    async def agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._result(messages, kwargs)
+
+    STREAM_CHUNKS = 10
+
+    def _chunks(self, messages, kwargs):
+        """把完整回應切成數段，延遲平均分配在各段之間"""
+        text = self._result(messages, kwargs).generations[0].message.content
+        size = max(1, len(text) // self.STREAM_CHUNKS + 1)
+        return [ChatGenerationChunk(message=AIMessageChunk(content=text[i:i + size]))
+                for i in range(0, len(text), size)]
+
+    def stream(self, messages, stop=None, run_manager=None, **kwargs):
+        chunks = self._chunks(messages, kwargs)
+        for chunk in chunks:
+            time.sleep(self.latency / len(chunks))
+            yield chunk
+
+    async def astream(self, messages, stop=None, run_manager=None, **kwargs):
+        chunks = self._chunks(messages, kwargs)
+        for chunk in chunks:
+            await asyncio.sleep(self.latency / len(chunks))
+            yield chunk
+
+
+@contextmanager
+def install_fakes(counter, llm_latency=0.0, data_latency=0.0, search_latency=0.0,
+                  review_scores=lambda n, side: 92, search_down=False):
+    """替換所有外部依賴，離開 with 區塊時還原"""
+    import src.tools as tools
+    from src.price_store import PriceStore
+    from src.search_cache import search_cache
+
+    fake_llm = FakeGroq(counter, llm_latency, review_scores)
+    FakeTicker.counter, FakeTicker.latency = counter, data_latency
+    FakeSearch.counter, FakeSearch.latency, FakeSearch.down = counter, search_latency, search_down
+
+    saved = {
+        "generate": ChatGroq._generate,
+        "agenerate": ChatGroq._agenerate,
+        "stream": ChatGroq._stream,
+        "astream": ChatGroq._astream,
+        "search": tools.search_tool,
+        "price_factory": tools.price_history._ticker_factory,
+        "download": tools.price_history._download,
+        "store": tools.price_history.store,
+        "snapshot_factory": tools.ticker_snapshots._ticker_factory,
+        "api_key": os.environ.get("GROQ_API_KEY"),
+    }
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+    ChatGroq._generate = fake_llm.generate
+    ChatGroq._agenerate = fake_llm.agenerate
+    ChatGroq._stream = fake_llm.stream
+    ChatGroq._astream = fake_llm.astream
+    tools.search_tool = FakeSearch
+    tools.price_history._ticker_factory = FakeTicker
+    tools.price_history._download = fake_download
+    # 每次都從空的本機股價庫開始，呼叫次數才不會受上一次執行影響
+    store_dir = tempfile.TemporaryDirectory()
+    tools.price_history.store = PriceStore(store_dir.name)
+    tools.ticker_snapshots._ticker_factory = FakeTicker
+    tools.price_history.clear()
+    tools.ticker_snapshots.clear()
+    tools.technical_screens.clear()
+    search_cache.clear()
+    try:
+        yield fake_llm
+    finally:
+        ChatGroq._generate = saved["generate"]
+        ChatGroq._agenerate = saved["agenerate"]
+        ChatGroq._stream = saved["stream"]
+        ChatGroq._astream = saved["astream"]
+        tools.search_tool = saved["search"]
+        tools.price_history._ticker_factory = saved["price_factory"]
+        tools.price_history._download = saved["download"]
+        tools.price_history.store = saved["store"]
+        store_dir.cleanup()
+        tools.ticker_snapshots._ticker_factory = saved["snapshot_factory"]
+        tools.price_history.clear()
+        tools.ticker_snapshots.clear()
+        tools.technical_screens.clear()
+        search_cache.clear()
+        if saved["api_key"] is None:
+            os.environ.pop("GROQ_API_KEY", None)
@@ -0,0 +1,45 @@
+"""
+錄製 benchmark 用的市場數據 fixture (需要網路)。
+
+    python -m benchmarks.record_fixtures TSLA --name SAMPLE
+
+會寫出 fixtures/<name>_history.csv 與 fixtures/<name>_info.json，
+格式與 benchmarks/fakes.py 的 FakeTicker 讀取的一致。
+"""
+import argparse
+import json
+import os
+import yfinance as yf
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+INFO_KEYS = [
+    "longName", "sector", "industry", "longBusinessSummary", "website", "currentPrice",
+    "marketCap", "trailingPE", "forwardPE", "pegRatio", "revenueGrowth", "profitMargins",
+    "targetMeanPrice", "recommendationKey",
+]
+
+def record(ticker, name):
+    stock = yf.Ticker(ticker)
+    hist = stock.history(period="5y")[["Open", "High", "Low", "Close", "Volume"]].round(2)
+    hist.index = hist.index.strftime("%Y-%m-%d")
+    hist.index.name = "Date"
+    hist.to_csv(os.path.join(FIXTURE_DIR, f"{name}_history.csv"))
+
+    def records(df):
+        return [] if df is None else json.loads(df.to_json(orient="records"))
+
+    snapshot = {
+        "info": {k: stock.info.get(k) for k in INFO_KEYS},
+        "institutional_holders": records(stock.institutional_holders)[:4],
+        "major_holders": records(stock.major_holders),
+    }
+    with open(os.path.join(FIXTURE_DIR, f"{name}_info.json"), "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2, ensure_ascii=False)
+    print(f"✅ Recorded {ticker} -> {name} ({len(hist)} bars)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record yfinance fixtures for benchmarks")
+    parser.add_argument("ticker")
+    parser.add_argument("--name", default="SAMPLE")
+    args = parser.parse_args()
+    record(args.ticker, args.name)
@@ -0,0 +1,246 @@
+"""
+離線 Benchmark：以假的 LLM / yfinance / DuckDuckGo 驅動 get_graph()，
+量測牆鐘時間、各 Node 延遲、記憶體峰值與各來源呼叫次數，並與 baselines.json 比較。
+
+    python -m benchmarks.run_benchmarks                     # 跑全部情境並檢查退步
+    python -m benchmarks.run_benchmarks --scenario batch
+    python -m benchmarks.run_benchmarks --update-baselines  # 以本次結果更新基準
+
+另外檢查 `import main` 的冷啟動時間不超過 SystemConfig.STARTUP_BUDGET_S (固定上限，不寫入 baselines)。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import SystemConfig
+from src import ratelimit, resilience
+from src.graph import get_graph
+from src.tools import price_history, ResearchService
+from src.research_index import research_index
+from src.telemetry import start_run
+from src.startup import measure_startup
+from benchmarks.fakes import CallCounter, install_fakes
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+# 數值很小時比例容忍度不穩定，另外給一點絕對寬限
+WALL_SLACK_S = 0.1
+MEM_SLACK_MB = 1.0
+
+# 情境設定：review_scores(n, side) 為該方第 n 次審核的分數；
+# prefetch / shared_research 對應 main.run_batch 的批次預先下載 (含整批技術指標) 與批次研究索引；
+# config 為這個情境暫時覆寫的 SystemConfig 設定
+SCENARIOS = {
+    "first_pass": {
+        "description": "經理第一次審核就雙雙通過",
+        "tickers": ["TSLA"],
+        "review_scores": lambda n, side: SystemConfig.PASS_THRESHOLD + 4,
+    },
+    "max_revisions": {
+        "description": "分數始終不及格，跑滿 MAX_REVISIONS 次修改",
+        "tickers": ["TSLA"],
+        "review_scores": lambda n, side: SystemConfig.PASS_THRESHOLD - 8,
+        "config": {"EARLY_EXIT": False},
+    },
+    "one_sided": {
+        "description": "Bull 第一次就通過，Bear 修改三次才通過 (兩條迴圈互不等待)",
+        "tickers": ["TSLA"],
+        "review_scores": lambda n, side: SystemConfig.PASS_THRESHOLD + (4 if side == "bull" or n >= 3 else -8),
+        "config": {"EARLY_EXIT": False},
+    },
+    "early_exit": {
+        "description": "Bull 分數停滯、Bear 進步太慢到不了門檻，收斂控制各自提早結束修改",
+        "tickers": ["TSLA"],
+        "review_scores": lambda n, side: SystemConfig.PASS_THRESHOLD - (8 if side == "bull" else 28 - n),
+    },
+    "batch": {
+        "description": "多檔批次 (兩兩為同業)，共用同一個 graph、worker pool 與研究索引",
+        "tickers": ["NVDA", "AMD", "AVGO", "TSM", "INTC", "QCOM", "MU", "ARM"],
+        "review_scores": lambda n, side: SystemConfig.PASS_THRESHOLD + (4 if n else -3),
+        "workers": 4,
+        "prefetch": True,
+        "shared_research": True,
+    },
+    "search_outage": {
+        "description": "DuckDuckGo 整個斷線：斷路器開啟後不再呼叫，流程照常完成",
+        "tickers": ["NVDA", "AMD", "AVGO", "TSM"],
+        "review_scores": lambda n, side: SystemConfig.PASS_THRESHOLD + (4 if n else -3),
+        "search_down": True,
+    },
+}
+
+
+@contextlib.contextmanager
+def benchmark_env():
+    """
+    Benchmark 量測的是流程本身，不是 API 額度：
+    換成不會等待的限速器 (保留並行上限)，並關閉 trace 檔輸出。
+    """
+    saved_limiters = ratelimit.rate_limiters.copy()
+    saved_trace = SystemConfig.TRACE_ENABLED
+    saved_resilience = SystemConfig.RESILIENCE
+    ratelimit.rate_limiters.update({
+        source: ratelimit.RateLimiter(1e9, max_concurrent=limits.get("max_concurrent"))
+        for source, limits in SystemConfig.RATE_LIMITS.items()
+    })
+    SystemConfig.TRACE_ENABLED = False
+    # 重試不退避 (避免隨機等待造成時間雜訊)，每個情境從全新的斷路器開始
+    SystemConfig.RESILIENCE = {source: {**settings, "backoff": 0} for source, settings in saved_resilience.items()}
+    resilience.reset()
+    try:
+        yield
+    finally:
+        ratelimit.rate_limiters.update(saved_limiters)
+        SystemConfig.TRACE_ENABLED = saved_trace
+        SystemConfig.RESILIENCE = saved_resilience
+        resilience.reset()
+
+
+@contextlib.contextmanager
+def config_overrides(overrides):
+    """套用情境專屬的 SystemConfig 設定，離開時還原"""
+    saved = {key: getattr(SystemConfig, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(SystemConfig, key, value)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(SystemConfig, key, value)
+
+
+def warm_up():
+    """先跑一次不計時的流程，排除 import 與 client 初始化等一次性成本"""
+    with benchmark_env(), install_fakes(CallCounter()), contextlib.redirect_stdout(io.StringIO()):
+        for _ in get_graph().stream({"ticker": "WARMUP", "revision_count": 0}):
+            pass
+
+
+def run_scenario(name, llm_latency, data_latency, search_latency):
+    scenario = SCENARIOS[name]
+    counter = CallCounter()
+    traces = []
+
+    def run_one(app, ticker):
+        with start_run(ticker, f"bench-{name}") as trace:
+            for _ in app.stream({"ticker": ticker, "revision_count": 0}):
+                pass
+        traces.append(trace)
+
+    with benchmark_env(), config_overrides(scenario.get("config", {})), \
+            install_fakes(counter, llm_latency, data_latency, search_latency,
+                          scenario["review_scores"], scenario.get("search_down", False)):
+        app = get_graph()
+        tracemalloc.start()
+        start = time.perf_counter()
+        # 節點本身的 print 不列入輸出
+        with contextlib.redirect_stdout(io.StringIO()), \
+                (research_index.batch(scenario["tickers"]) if scenario.get("shared_research") else contextlib.nullcontext()):
+            if scenario.get("prefetch"):
+                price_history.prefetch(scenario["tickers"])
+                ResearchService.prescreen_technicals(scenario["tickers"])
+            with ThreadPoolExecutor(max_workers=scenario.get("workers", 1)) as pool:
+                list(pool.map(lambda t: run_one(app, t), scenario["tickers"]))
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    nodes = {}
+    for trace in traces:
+        for (kind, span_name), row in trace.summary().items():
+            if kind == "node":
+                node = nodes.setdefault(span_name, {"calls": 0, "wall_s": 0.0})
+                node["calls"] += row["calls"]
+                node["wall_s"] = round(node["wall_s"] + row["wall_s"], 4)
+
+    return {
+        "tickers": len(scenario["tickers"]),
+        "wall_s": round(wall, 4),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "calls": counter.snapshot(),
+        "nodes": nodes,
+    }
+
+
+def compare(name, result, baseline, tolerance):
+    """回傳退步項目的說明清單"""
+    problems = []
+    if result["wall_s"] > baseline["wall_s"] * (1 + tolerance) + WALL_SLACK_S:
+        problems.append(f"wall_s {result['wall_s']:.3f} > baseline {baseline['wall_s']:.3f} (+{tolerance:.0%})")
+    if result["peak_mb"] > baseline["peak_mb"] * (1 + tolerance) + MEM_SLACK_MB:
+        problems.append(f"peak_mb {result['peak_mb']:.2f} > baseline {baseline['peak_mb']:.2f} (+{tolerance:.0%})")
+    for source, count in result["calls"].items():
+        allowed = baseline["calls"].get(source, 0)
+        if count > allowed:
+            problems.append(f"calls[{source}] {count} > baseline {allowed}")
+    return [f"{name}: {p}" for p in problems]
+
+
+def print_result(name, result):
+    print(f"\n📏 {name} — {SCENARIOS[name]['description']}")
+    print(f"   Tickers: {result['tickers']} | Wall: {result['wall_s']:.3f}s | Peak Mem: {result['peak_mb']:.2f} MB")
+    print(f"   Calls: " + ", ".join(f"{k}={v}" for k, v in result["calls"].items()))
+    for node, row in sorted(result["nodes"].items(), key=lambda kv: -kv[1]["wall_s"]):
+        print(f"   {node:<20} {row['calls']:>4} calls {row['wall_s']:>8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="只跑指定情境 (可重複)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="假 LLM 每次呼叫延遲秒數")
+    parser.add_argument("--data-latency", type=float, default=0.02, help="假 yfinance 每次呼叫延遲秒數")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="假 DuckDuckGo 每次呼叫延遲秒數")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="時間與記憶體允許的退步比例")
+    parser.add_argument("--update-baselines", action="store_true", help="以本次結果覆寫 baselines.json")
+    args = parser.parse_args()
+
+    names = args.scenario or list(SCENARIOS)
+    warm_up()
+    results = {name: run_scenario(name, args.llm_latency, args.data_latency, args.search_latency) for name in names}
+    for name, result in results.items():
+        print_result(name, result)
+    startup_s = measure_startup()
+    print(f"\n🚀 Cold start: import main = {startup_s:.3f}s (budget {SystemConfig.STARTUP_BUDGET_S:.2f}s)")
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        for name, result in results.items():
+            baselines[name] = {k: result[k] for k in ("wall_s", "peak_mb", "calls")}
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n💾 Baselines updated: {BASELINE_PATH}")
+        return 0
+
+    problems = []
+    if startup_s > SystemConfig.STARTUP_BUDGET_S:
+        problems.append(f"startup: import main {startup_s:.3f}s > budget {SystemConfig.STARTUP_BUDGET_S:.2f}s")
+    for name, result in results.items():
+        if name in baselines:
+            problems += compare(name, result, baselines[name], args.tolerance)
+        else:
+            print(f"\n⚠️ No baseline for {name} (run with --update-baselines)")
+
+    if problems:
+        print("\n❌ Regressions detected:")
+        for p in problems:
+            print(f"   - {p}")
+        return 1
+    print("\n✅ No regressions against baselines.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
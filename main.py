@@ -1,108 +1,408 @@
 import os
-import re
-import matplotlib.pyplot as plt
-import yfinance as yf
-import pandas as pd
-import markdown
-from src.graph import get_graph
+import time
+import argparse
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.config import SystemConfig
+from src.search_cache import search_cache
+from src.research_index import research_index
+from src.telemetry import start_run
+from src.output import OutputStage, render_markdown, render_report, write_report
+from src.service import AnalysisService, serve
+# langgraph / langchain / pandas 等較重的套件 (src.graph、src.tools) 在函式內才 import，
+# --help 與 --profile-startup 不必等它們載入；冷啟動上限見 SystemConfig.STARTUP_BUDGET_S
 
 # === 設定目標 ===
 TICKER = "TSLA"
 OUTPUT_DIR = "output"
+REPORT_FLUSH_INTERVAL = 0.5   # 串流模式下 HTML 報告最短的重寫間隔 (秒)
+OUTPUT_WORKERS = 2            # 批次模式產生報告與圖表的 process 數
 
-def save_report(state):
-    """將結果生成為 HTML (Markdown 渲染修復版)"""
-    ticker = state['ticker']
-    domain = f"{ticker.split('.')[0].lower()}.com"
+class StreamingReport:
+    """
+    串流模式：說書人每產生一段文字就更新 HTML 報告，不必等整篇生成完。
+    已完成的段落 (以空行分隔) 只轉換一次 markdown，之後只重新轉換最後還在生成的段落。
+    """
+    def __init__(self, state, prefix="", name=None):
+        self.state = state          # 與 run_ticker 的 final_state 同一份，經理結論會即時反映
+        self.prefix = prefix
+        self.name = name            # 輸出檔名 (預設 ticker)
+        self.text = ""
+        self._done_html = []
+        self._done_len = 0
+        self._last_flush = 0.0
+        self._start = time.monotonic()
+        self.first_token_s = None
+
+    def feed(self, token):
+        if not token:
+            return
+        if self.first_token_s is None:
+            self.first_token_s = time.monotonic() - self._start
+            print(f"{self.prefix}⚡ First report content after {self.first_token_s:.1f}s")
+        self.text += token
+        if time.monotonic() - self._last_flush >= REPORT_FLUSH_INTERVAL:
+            self.flush()
+
+    def _render(self):
+        cut = self.text.rfind("\n\n")
+        if cut > self._done_len:
+            self._done_html.append(render_markdown(self.text[self._done_len:cut]))
+            self._done_len = cut
+        return "\n".join(self._done_html + [render_markdown(self.text[self._done_len:])])
+
+    def flush(self):
+        write_report(OUTPUT_DIR, self.name or self.state['ticker'],
+                     render_report(self.state, self._render(), in_progress=True))
+        self._last_flush = time.monotonic()
+
+def chart_data(ticker):
+    """
+    趨勢圖要用的價格：沿用 Researcher 已抓好的價格歷史，不再重新下載。
+    均線用 1 年資料計算，圖表開頭的 SMA20 才不會是空的。
+    """
+    import pandas as pd
+    from src import indicators
+    from src.tools import price_history
+    try:
+        hist = price_history.window(ticker, "1y")
+        if hist.empty: return None
+        sma_20 = pd.Series(indicators.sma(hist['Close'].to_numpy(), 20)[:, 0], index=hist.index)
+        df = price_history.window(ticker, "6mo")[['Close']].copy()
+        df['SMA20'] = sma_20.loc[df.index]
+        return df
+    except Exception:
+        return None
+
+# AgentState 中以 operator.add 累加的欄位：節點回傳的是增量，合併時要加總而不是覆蓋
+ACCUMULATED_FIELDS = ("revision_count",)
+
+def log_update(output, final_state, prefix=""):
+    """顯示節點進度並合併到最終 state"""
+    for key, val in output.items():
+        if val:
+            print(f"{prefix}📍 Node Finished: {key}")
+            for side in ("bull", "bear"):
+                if f"{side}_score" in val:
+                    print(f"{prefix}   📊 Score: {side.capitalize()} {val[f'{side}_score']} (revision {val[f'{side}_revisions']})")
+                if val.get(f"{side}_stop_reason"):
+                    print(f"{prefix}   🏁 {side.capitalize()} lane finished: {val[f'{side}_stop_reason']}")
+            for field in ACCUMULATED_FIELDS:
+                if field in val:
+                    val = {**val, field: final_state.get(field, 0) + val[field]}
+            final_state.update(val)
+
+def resume_point(snapshot, ticker, resume, prefix=""):
+    """
+    依 checkpoint 決定要從哪裡開始：
+    回傳 (stream 的輸入, 目前累積的 state)。輸入為 None 代表從最後完成的節點繼續。
+    不是 --resume 卻遇到已存在的 checkpoint 時拒絕執行：新的輸入會併進舊 state，
+    舊的報告、分數與修改次數會被當成這次的結果沿用。
+    --resume 卻找不到 checkpoint 時也拒絕執行 (多半是 run id 或 ticker 打錯)，不默默從頭跑。
+    """
+    inputs = {"ticker": ticker, "revision_count": 0}
+    if snapshot is None or not snapshot.values:
+        if resume:
+            raise RuntimeError(f"run id has no checkpoint for {ticker}; "
+                               "check the run id and tickers, or run without --resume")
+        return inputs, inputs.copy()
+    if not resume:
+        raise RuntimeError(f"run id already has a checkpoint for {ticker}; "
+                           "use --resume to continue it or pass a new --run-id")
+    if snapshot.next:
+        print(f"{prefix}⏯️ Resuming from checkpoint (next: {', '.join(snapshot.next)})")
+    else:
+        print(f"{prefix}⏯️ Checkpoint already finished, reusing saved result")
+    return None, dict(snapshot.values)
+
+def handle_event(event, final_state, prefix="", report=None):
+    """
+    串流模式下 graph 同時輸出 ("updates", 節點結果) 與 ("messages", (token, metadata))，
+    只有說書人的 token 會寫進報告。
+    """
+    mode, data = event
+    if mode == "updates":
+        log_update(data, final_state, prefix)
+    elif report is not None:
+        chunk, metadata = data
+        if metadata.get("langgraph_node") == "storyteller_node" and isinstance(chunk.content, str):
+            report.feed(chunk.content)
+
+def run_ticker(app, ticker, prefix="", config=None, resume=False, run_id=None, show_trace=False, stream=False,
+               output_name=None):
+    """執行單一 ticker 的完整流程，回傳最終 state (output_name 為串流報告的檔名，預設 ticker)"""
+    with start_run(ticker, run_id) as trace:
+        snapshot = app.get_state(config) if config else None
+        inputs, final_state = resume_point(snapshot, ticker, resume, prefix)
+        if snapshot is None or not snapshot.values or snapshot.next:
+            # 執行並顯示進度
+            if stream:
+                report = StreamingReport(final_state, prefix, output_name)
+                for event in app.stream(inputs, config, stream_mode=["updates", "messages"]):
+                    handle_event(event, final_state, prefix, report)
+            else:
+                for output in app.stream(inputs, config):
+                    log_update(output, final_state, prefix)
+    if show_trace: trace.print_summary()
+    return final_state
+
+async def arun_ticker(app, ticker, prefix="", config=None, resume=False, run_id=None, show_trace=False, stream=False,
+                      output_name=None):
+    """非同步版本：以 astream 驅動 graph"""
+    with start_run(ticker, run_id) as trace:
+        snapshot = await app.aget_state(config) if config else None
+        inputs, final_state = resume_point(snapshot, ticker, resume, prefix)
+        if snapshot is None or not snapshot.values or snapshot.next:
+            if stream:
+                report = StreamingReport(final_state, prefix, output_name)
+                async for event in app.astream(inputs, config, stream_mode=["updates", "messages"]):
+                    handle_event(event, final_state, prefix, report)
+            else:
+                async for output in app.astream(inputs, config):
+                    log_update(output, final_state, prefix)
+    if show_trace: trace.print_summary()
+    return final_state
+
+def save_outputs(final_state, outputs, prefix="", name=None):
+    """把報告與圖表交給輸出階段；批次模式下會在背景 process 完成"""
+    if final_state and "story_content" in final_state:
+        outputs.submit(final_state, chart_data(final_state["ticker"]), prefix, name)
+        return True
+    return False
+
+def load_tickers(args):
+    """從 CLI 參數與 --file 清單合併 ticker (保留順序、去除重複)"""
+    tickers = list(args.tickers)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#")[0].strip()
+                if line: tickers.extend(line.replace(",", " ").split())
+    tickers = [t.upper() for t in tickers]
+    return list(dict.fromkeys(tickers)) or [TICKER]
+
+def print_summary(tickers, timings, total, run_id=None):
+    succeeded = sum(1 for ok, _ in timings.values() if ok)
+    print("\n📊 Batch Summary")
+    print(f"   Tickers: {len(tickers)} | Succeeded: {succeeded} | Failed: {len(tickers) - succeeded}")
+    print(f"   Wall Time: {total:.1f}s | Throughput: {len(tickers) / total * 60:.2f} tickers/min")
+    for ticker, (ok, elapsed) in sorted(timings.items(), key=lambda kv: -kv[1][1]):
+        print(f"   {'✅' if ok else '❌'} {ticker:<10} {elapsed:8.1f}s")
+    print_search_stats()
+    if run_id and succeeded < len(tickers):
+        failed = " ".join(t for t in tickers if not timings.get(t, (False, 0))[0])
+        print(f"   ⏯️ Resume failed tickers with: python main.py {failed} --resume {run_id}")
+
+def print_search_stats():
+    stats = search_cache.stats()
+    if any(stats.values()):
+        shared = f" ({research_index.reused} shared across tickers)" if research_index.reused else ""
+        print(f"   🔎 Search Cache: {stats['hits']} hits | {stats['near_hits']} near-duplicate | {stats['misses']} misses{shared}")
+
+def report_result(ticker, final_state, error, elapsed, outputs):
+    """輸出單檔結果，回傳是否成功"""
+    if error is not None:
+        print(f"[{ticker}] ❌ Failed: {error}")
+        return False
+    ok = save_outputs(final_state, outputs, prefix=f"[{ticker}] ")
+    print(f"[{ticker}] {'🎉 Done' if ok else '⚠️ Workflow ended unexpectedly'} ({elapsed:.1f}s)")
+    return ok
+
+def prefetch_prices(tickers):
+    """
+    批次開始前一次下載所有 ticker 的股價，再把整個清單的技術指標一次算完；
+    任何一步失敗時，各 ticker 會在 Researcher 自行下載與計算。
+    """
+    from src.tools import price_history, ResearchService
     try:
-        # 嘗試抓取比較精確的網域
-        match = re.search(r'https?://(www\.)?([a-zA-Z0-9-]+\.[a-zA-Z]+)', str(state.get('market_data','')))
-        if match: domain = match.group(2)
-    except: pass
-    
-    img_src = f"https://www.google.com/s2/favicons?domain={domain}&sz=128"
-    
-    # 2. 使用 markdown 套件將文字轉為 HTML
-    # extensions=['extra'] 可以支援表格和更豐富的格式
-    raw_content = state['story_content']
-    html_content = markdown.markdown(raw_content, extensions=['extra'])
-    
-    html = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; max-width: 800px; margin: 40px auto; padding: 20px; background-color: #f4f4f9; color: #333; line-height: 1.6; }} 
-            .container {{ background: #ffffff; padding: 40px; border-radius: 15px; box-shadow: 0 4px 15px rgba(0,0,0,0.1); }}
-            
-            /* 標題樣式 */
-            h1 {{ color: #2c3e50; border-bottom: 2px solid #eee; padding-bottom: 10px; }}
-            h2 {{ color: #e67e22; margin-top: 30px; }}
-            h3 {{ color: #2980b9; margin-top: 25px; }}
-            
-            /* 重點文字 */
-            strong {{ color: #c0392b; }}
-            
-            /* 列表樣式 */
-            ul {{ padding-left: 20px; }}
-            li {{ margin-bottom: 8px; }}
-            
-            /* 頂部 Header */
-            .header {{ display: flex; align-items: center; margin-bottom: 30px; }}
-            .header img {{ width: 64px; height: 64px; margin-right: 20px; border-radius: 10px; }}
-            .source {{ color: #7f8c8d; font-size: 0.9em; }}
-            
-            /* 經理結論區塊 */
-            .verdict {{ background-color: #ecf0f1; padding: 15px; border-left: 5px solid #bdc3c7; margin-top: 30px; border-radius: 4px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <img src="{img_src}" onerror="this.src='https://via.placeholder.com/64'">
-                <div>
-                    <h1 style="margin:0; border:none;">{ticker} Analysis Report</h1>
-                    <span class="source">Source: {domain}</span>
-                </div>
-            </div>
-            
-            {html_content}
-            
-            <div class="verdict">
-                <h3>🤵 Manager's Verdict</h3>
-                <p>{state.get('final_decision')}</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    path = f"{OUTPUT_DIR}/report_{ticker}.html"
-    with open(path, "w", encoding="utf-8") as f: f.write(html)
-    print(f"✅ HTML Report saved: {path}")
-
-def save_chart(ticker):
-    """生成 K 線圖並存檔"""
+        start = time.monotonic()
+        requests = price_history.prefetch(tickers)
+        if requests:
+            print(f"📦 Prefetched price history for {len(tickers)} tickers in {requests} bulk download(s) ({time.monotonic() - start:.1f}s)")
+    except Exception as e:
+        print(f"⚠️ Bulk price download failed, falling back to per-ticker requests: {e}")
     try:
-        df = yf.Ticker(ticker).history(period="6mo")
-        if df.empty: return
-        df['SMA20'] = df['Close'].rolling(20).mean()
-        
-        plt.figure(figsize=(10,5))
-        plt.plot(df.index, df['Close'], label='Close')
-        plt.plot(df.index, df['SMA20'], label='SMA20', linestyle='--')
-        plt.title(f"{ticker} Trend")
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        
-        path = f"{OUTPUT_DIR}/chart_{ticker}.png"
-        plt.savefig(path)
-        plt.close()
-        print(f"✅ Chart saved: {path}")
-    except: pass
+        start = time.monotonic()
+        screened = ResearchService.prescreen_technicals(tickers)
+        if screened:
+            print(f"📐 Screened technicals for {screened} tickers in one pass ({time.monotonic() - start:.2f}s)")
+    except Exception as e:
+        print(f"⚠️ Batch technical screen failed, computing per ticker: {e}")
+
+def run_batch(app, tickers, workers, run_id=None, resume=False, stream=False):
+    """
+    批次模式：共用同一個編譯好的 graph，多檔同時執行。
+    LLM / 數據來源的全域並行上限由 SystemConfig.RATE_LIMITS 控制。
+    每檔完成就立刻輸出報告，最後印出吞吐量摘要。
+    """
+    from src.graph import thread_config
+    print(f"🚀 Starting Batch Analysis for {len(tickers)} tickers (workers={workers})...")
+    prefetch_prices(tickers)
+    timings = {}
+    batch_start = time.monotonic()
+
+    def job(ticker):
+        start = time.monotonic()
+        try:
+            config = thread_config(ticker, run_id) if run_id else None
+            state = run_ticker(app, ticker, prefix=f"[{ticker}] ", config=config, resume=resume, run_id=run_id,
+                               stream=stream)
+            error = None
+        except Exception as e:
+            state, error = None, e
+        return state, error, time.monotonic() - start
+
+    # 報告與圖表交給 process pool，與其他 ticker 的 graph 同時進行
+    with research_index.batch(tickers), OutputStage(OUTPUT_DIR, OUTPUT_WORKERS) as outputs, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(job, t): t for t in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            final_state, error, elapsed = future.result()
+            timings[ticker] = (report_result(ticker, final_state, error, elapsed, outputs), elapsed)
+
+    print_summary(tickers, timings, time.monotonic() - batch_start, run_id)
+
+async def arun_batch(app, tickers, workers, run_id=None, resume=False, stream=False):
+    """
+    非同步批次模式：所有 ticker 在同一個 event loop 上多工執行，
+    以 Semaphore 限制同時進行的數量，不需要每檔一個執行緒。
+    """
+    from src.graph import thread_config
+    print(f"🚀 Starting Async Batch Analysis for {len(tickers)} tickers (concurrency={workers})...")
+    await asyncio.to_thread(prefetch_prices, tickers)
+    timings = {}
+    batch_start = time.monotonic()
+    semaphore = asyncio.Semaphore(workers)
+
+    async def job(ticker):
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                config = thread_config(ticker, run_id) if run_id else None
+                state = await arun_ticker(app, ticker, prefix=f"[{ticker}] ", config=config, resume=resume,
+                                          run_id=run_id, stream=stream)
+                error = None
+            except Exception as e:
+                state, error = None, e
+            return ticker, state, error, time.monotonic() - start
+
+    with research_index.batch(tickers), OutputStage(OUTPUT_DIR, OUTPUT_WORKERS) as outputs:
+        for next_done in asyncio.as_completed([job(t) for t in tickers]):
+            ticker, final_state, error, elapsed = await next_done
+            timings[ticker] = (report_result(ticker, final_state, error, elapsed, outputs), elapsed)
+        # 等待最後幾份報告寫完時不佔住 event loop
+        await asyncio.to_thread(outputs.close)
+
+    print_summary(tickers, timings, time.monotonic() - batch_start, run_id)
+
+def finish_single(final_state, ticker, run_id):
+    print_search_stats()
+    if save_outputs(final_state, OutputStage(OUTPUT_DIR)):
+        print("🎉 All tasks completed!")
+    else:
+        hint = f" Resume with: python main.py {ticker} --resume {run_id}" if run_id else ""
+        print(f"⚠️ Workflow ended unexpectedly.{hint}")
+
+def run_single(app, ticker, run_id=None, resume=False, stream=False):
+    from src.graph import thread_config
+    print(f"🚀 Starting Analysis for {ticker}...")
+    config = thread_config(ticker, run_id) if run_id else None
+    try:
+        final_state = run_ticker(app, ticker, config=config, resume=resume, run_id=run_id, show_trace=True,
+                                 stream=stream)
+    except Exception as e:
+        print(f"❌ Failed: {e}")
+        final_state = None
+    finish_single(final_state, ticker, run_id)
+
+async def arun_single(app, ticker, run_id=None, resume=False, stream=False):
+    from src.graph import thread_config
+    print(f"🚀 Starting Analysis for {ticker} (async)...")
+    config = thread_config(ticker, run_id) if run_id else None
+    try:
+        final_state = await arun_ticker(app, ticker, config=config, resume=resume, run_id=run_id, show_trace=True,
+                                        stream=stream)
+    except Exception as e:
+        print(f"❌ Failed: {e}")
+        final_state = None
+    finish_single(final_state, ticker, run_id)
+
+def run_service(workers, port=None, stream=False):
+    """
+    常駐模式：graph 只編譯一次，之後每個 job 都直接用暖機好的 graph、快取與輸出 process。
+    有 checkpoint 時以 job id 當 run id，失敗的 job 之後可用 --resume <job id> 續跑。
+    """
+    from src.graph import get_graph, get_checkpointer, thread_config
+    checkpointer = get_checkpointer() if SystemConfig.CHECKPOINT_ENABLED else None
+    app = get_graph(checkpointer=checkpointer)
+    outputs = OutputStage(OUTPUT_DIR, OUTPUT_WORKERS)
+
+    def analyze(ticker, job_id):
+        # 同一檔可能同時有多個 job，輸出檔名帶 job id 才不會互相覆蓋
+        name = f"{ticker}_{job_id}"
+        config = thread_config(ticker, job_id) if checkpointer else None
+        final_state = run_ticker(app, ticker, prefix=f"[{ticker}] ", config=config,
+                                 run_id=job_id if checkpointer else None, stream=stream, output_name=name)
+        if not save_outputs(final_state, outputs, prefix=f"[{ticker}] ", name=name):
+            raise RuntimeError("workflow ended unexpectedly")
+        return {
+            "final_decision": final_state.get("final_decision"),
+            "bull_score": final_state.get("bull_score"),
+            "bear_score": final_state.get("bear_score"),
+            "report": f"{OUTPUT_DIR}/report_{name}.html",
+            "chart": f"{OUTPUT_DIR}/chart_{name}.png",
+        }
+
+    try:
+        serve(AnalysisService(analyze, workers, SystemConfig.SERVICE_QUEUE_SIZE), port=port)
+    finally:
+        outputs.close()
+
+async def amain(tickers, workers, run_id=None, resume=False, stream=False):
+    """非同步入口：有 run id 時掛上 SQLite checkpointer"""
+    from src.graph import aget_graph, aget_checkpointer
+    async with (aget_checkpointer() if run_id else contextlib.nullcontext()) as checkpointer:
+        app = aget_graph(checkpointer=checkpointer)
+        if len(tickers) > 1:
+            await arun_batch(app, tickers, workers, run_id, resume, stream)
+        else:
+            await arun_single(app, tickers[0], run_id, resume, stream)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dialectic Flow Financial Graph")
+    parser.add_argument("tickers", nargs="*", help=f"股票代碼，可一次多檔 (預設 {TICKER})")
+    parser.add_argument("--file", help="ticker 清單檔 (一行一檔，# 為註解)")
+    parser.add_argument("--workers", type=int, default=SystemConfig.BATCH_WORKERS,
+                        help="批次模式同時執行的 ticker 數")
+    parser.add_argument("--llm-cache", choices=SystemConfig.LLM_CACHE_MODES, default=SystemConfig.LLM_CACHE_MODE,
+                        help="LLM 回應快取: off / rw (讀寫) / ro (唯讀重播)")
+    parser.add_argument("--run-id", default=time.strftime("%Y%m%d-%H%M%S"),
+                        help="本次執行的 ID (checkpoint 以 ticker + run id 區分)")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="從指定 run id 的最後完成節點繼續執行")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="使用非同步 graph (astream)，所有 ticker 共用一個 event loop")
+    parser.add_argument("--stream", action="store_true",
+                        help="串流說書人輸出，邊生成邊更新 HTML 報告")
+    parser.add_argument("--serve", action="store_true",
+                        help="常駐服務模式：以 HTTP 接收 ticker job (POST /jobs)")
+    parser.add_argument("--port", type=int, default=SystemConfig.SERVICE_PORT,
+                        help="--serve 的 HTTP port")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="列出 import main 時各模組的載入時間並檢查冷啟動上限")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.profile_startup:
+        from src.startup import print_startup_profile
+        exit(0 if print_startup_profile() else 1)
+
+    from src.llm_cache import llm_cache
+    llm_cache.set_mode(args.llm_cache)
+
     # 檢查 API Key
     if not SystemConfig.GROQ_API_KEY:
         print("❌ Error: GROQ_API_KEY not found in .env")
@@ -110,24 +410,25 @@ if __name__ == "__main__":
 
     if not os.path.exists(OUTPUT_DIR): os.makedirs(OUTPUT_DIR)
 
-    print(f"🚀 Starting Analysis for {TICKER}...")
-    app = get_graph()
-    
-    inputs = {"ticker": TICKER, "revision_count": 0}
-    final_state = inputs.copy()
-    
-    # 執行並顯示進度
-    for output in app.stream(inputs):
-        for key, val in output.items():
-            if val:
-                print(f"📍 Node Finished: {key}")
-                if "bull_score" in val:
-                    print(f"   📊 Score: Bull {val['bull_score']} | Bear {val['bear_score']}")
-                final_state.update(val)
+    workers = max(1, args.workers)
+    if args.serve:
+        run_service(workers, args.port, args.stream)
+        exit()
 
-    if final_state and "story_content" in final_state:
-        save_report(final_state)
-        save_chart(TICKER)
-        print("🎉 All tasks completed!")
+    tickers = load_tickers(args)
+    resume = args.resume is not None
+    run_id = args.resume or args.run_id
+    if SystemConfig.CHECKPOINT_ENABLED:
+        print(f"💾 Run ID: {run_id} (resume with: python main.py {' '.join(tickers)} --resume {run_id})")
+    else:
+        run_id = None
+
+    if args.use_async:
+        asyncio.run(amain(tickers, workers, run_id, resume, args.stream))
     else:
-        print("⚠️ Workflow ended unexpectedly.")
+        from src.graph import get_graph, get_checkpointer
+        app = get_graph(checkpointer=get_checkpointer() if run_id else None)
+        if len(tickers) > 1:
+            run_batch(app, tickers, workers, run_id, resume, args.stream)
+        else:
+            run_single(app, tickers[0], run_id, resume, args.stream)
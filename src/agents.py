@@ -1,16 +1,24 @@
+import asyncio
+import contextvars
+import hashlib
+import math
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from .config import SystemConfig
-from .state import AgentState, ManagerReview
-from .tools import ResearchService, get_model
+from .state import AgentState, SideReview, Verdict
+from .context import pack_context
+from .convergence import stop_reason, LLM_ERROR
+from .tools import ResearchService, get_model, invoke_chain, ainvoke_chain
+from .resilience import budget
+from .telemetry import traced
 
 # --- 定義各個節點邏輯 (Node Implementation) ---
+# 每個節點都有同步版 (xxx_node) 與非同步版 (axxx_node)，共用同一份 Prompt 與前後處理。
 
 # Search Tool of Bull & Bear
-def generate_search_query(ticker, feedback, role):
-    """根據 Feedback 產生搜尋關鍵字"""
-    time.sleep(SystemConfig.API_DELAY / 2)
+def _search_query_chain():
     llm = get_model(temperature=0.3)
     prompt = ChatPromptTemplate.from_template("""
     You are an expert search query engineer.
@@ -35,76 +43,196 @@ def generate_search_query(ticker, feedback, role):
 
     **OUTPUT:** Generate ONE single search query string. No quotes.
     """)
-    chain = prompt | llm | StrOutputParser()
-    return chain.invoke({"ticker": ticker, "feedback": feedback, "role": role})
+    return prompt | llm | StrOutputParser()
+
+# LLM 無法產生查詢時 (重試用完或已斷路) 依角色改用固定關鍵字，搜尋步驟不必整個跳過
+FALLBACK_QUERIES = {
+    "Bullish Analyst": "{ticker} revenue growth margin",
+    "Bearish Short-Seller": "{ticker} valuation debt risk",
+}
 
+def _fallback_query(ticker, role, error):
+    query = FALLBACK_QUERIES.get(role, "{ticker} stock analysis").format(ticker=ticker)
+    print(f"   ⚠️ 搜尋關鍵字產生失敗，改用: {query} ({error})")
+    return query
+
+@traced("query", "generate_search_query")
+def generate_search_query(ticker, feedback, role):
+    """根據 Feedback 產生搜尋關鍵字"""
+    try:
+        return invoke_chain(_search_query_chain(), {"ticker": ticker, "feedback": feedback, "role": role})
+    except Exception as e:
+        return _fallback_query(ticker, role, e)
+
+@traced("query", "generate_search_query")
+async def agenerate_search_query(ticker, feedback, role):
+    try:
+        return await ainvoke_chain(_search_query_chain(), {"ticker": ticker, "feedback": feedback, "role": role})
+    except Exception as e:
+        return _fallback_query(ticker, role, e)
+
+# Researcher 的數據來源 (section 名稱, 工具名稱)，順序即 combined_data 的排列順序
+# 非同步版本的工具名稱為前面加上 "a" (例如 aget_news)
+RESEARCH_TOOLS = [
+    ("Company Profile", "get_company_profile"),                     # 身家調查
+    ("History Price (For Time Machine)", "get_history_price"),      # 時光機數據
+    ("Fundamental Data", "get_stock_data"),                         # 基本面
+    ("Technical Analysis", "get_technicals"),                       # 技術面
+    ("Institutional Holdings", "get_institutional_holders"),        # 籌碼面
+    ("News Sentiment", "get_news"),                                 # 新聞
+]
+
+# 各 Prompt 實際會用到的 section (Bull / Bear 的 Prompt 本來就要求忽略 Profile 與 History)
+DEBATE_SECTIONS = ["Fundamental Data", "Technical Analysis", "Institutional Holdings", "News Sentiment"]
+STORY_SECTIONS = ["Company Profile", "History Price (For Time Machine)", "Technical Analysis", "Fundamental Data"]
+
+# 數據工具背後的外部來源；單一工具的逾時至少要涵蓋這些來源的完整重試預算
+RESEARCH_SOURCES = ("yfinance", "ddg")
+
+def _tool_timeout():
+    """TOOL_TIMEOUT 與韌性層重試預算取大者，重試不會在已被放棄的執行緒裡白跑"""
+    return max([SystemConfig.TOOL_TIMEOUT] + [b for b in map(budget, RESEARCH_SOURCES) if b])
+
+def _run_tools_sequential(ticker):
+    return {name: getattr(ResearchService, tool)(ticker) for name, tool in RESEARCH_TOOLS}
+
+def _run_tools_parallel(ticker):
+    """平行呼叫所有數據工具，每個工具各自計算逾時，慢的來源不會拖住其他結果"""
+    timeout = _tool_timeout()
+    workers = max(1, SystemConfig.RESEARCH_WORKERS)
+    # 排隊中的工具還沒開始計時，用整體期限避免無限等待
+    node_deadline = time.monotonic() + timeout * math.ceil(len(RESEARCH_TOOLS) / workers)
+    started = {}
+
+    def run(name, tool):
+        started[name] = time.monotonic()
+        return tool(ticker)
+
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="research")
+    # copy_context 讓工具執行緒沿用目前的 telemetry run
+    futures = {
+        pool.submit(contextvars.copy_context().run, run, name, getattr(ResearchService, tool)): name
+        for name, tool in RESEARCH_TOOLS
+    }
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = f"{name} Error: {str(e)}"
+
+            now = time.monotonic()
+            for future in list(pending):
+                name = futures[future]
+                start = started.get(name)
+                if (start is not None and now - start > timeout) or now > node_deadline:
+                    future.cancel()
+                    pending.discard(future)
+                    print(f"   ⏱️ [Researcher] {name} 逾時 ({timeout}s)，先略過。")
+                    results[name] = f"{name} Timeout (>{timeout}s)"
+    finally:
+        # 不等待逾時的執行緒，讓 Node 可以直接往下走
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+async def _run_tools_async(ticker):
+    """非同步版：以 Semaphore 限制並行數，每個工具各自 wait_for 逾時"""
+    timeout = _tool_timeout()
+    semaphore = asyncio.Semaphore(max(1, SystemConfig.RESEARCH_WORKERS))
+
+    async def run(name, tool):
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(getattr(ResearchService, "a" + tool)(ticker), timeout)
+            except asyncio.TimeoutError:
+                print(f"   ⏱️ [Researcher] {name} 逾時 ({timeout}s)，先略過。")
+                return f"{name} Timeout (>{timeout}s)"
+            except Exception as e:
+                return f"{name} Error: {str(e)}"
+
+    values = await asyncio.gather(*(run(name, tool) for name, tool in RESEARCH_TOOLS))
+    return {name: value for (name, _), value in zip(RESEARCH_TOOLS, values)}
+
+def _combine_research(results):
+    # 依固定順序存成各自的 section (與完成先後無關)，組成 Prompt 時再挑選
+    market_data = {name: results[name] for name, _ in RESEARCH_TOOLS}
+    return {
+        "market_data": market_data, "bull_findings": [], "bear_findings": [],
+        "bull_revisions": 0, "bear_revisions": 0, "bull_scores": [], "bear_scores": [],
+    }
+
+@traced("node", "research_node")
 def research_node(state: AgentState):
     """[節點 1] 研究員"""
     print(f"🔍 [System] 正在搜集 {state['ticker']} 的全方位數據...")
 
-    # 1. 基本面
-    basic_info = ResearchService.get_stock_data(state['ticker'])
-    # 2. 新聞
-    news_info = ResearchService.get_news(state['ticker'])
-    # 3. 技術面
-    tech_info = ResearchService.get_technicals(state['ticker'])
-    # 4. 籌碼面
-    inst_info = ResearchService.get_institutional_holders(state['ticker'])
-    # 5. 身家調查
-    profile_info = ResearchService.get_company_profile(state['ticker'])
-    # 6. 時光機數據
-    history_info = ResearchService.get_history_price(state['ticker'])
-
-    # 組合所有數據
-    combined_data = f"""
-    [Company Profile]: {profile_info}
-    [History Price (For Time Machine)]: {history_info}
-    [Fundamental Data]: {basic_info}
-    [Technical Analysis]: {tech_info}
-    [Institutional Holdings]: {inst_info}
-    [News Sentiment]: {news_info}
-    """
+    if SystemConfig.PARALLEL_RESEARCH:
+        results = _run_tools_parallel(state['ticker'])
+    else:
+        results = _run_tools_sequential(state['ticker'])
+    return _combine_research(results)
 
-    return {"market_data": combined_data, "revision_count": 0}
+@traced("node", "research_node")
+async def aresearch_node(state: AgentState):
+    print(f"🔍 [System] 正在搜集 {state['ticker']} 的全方位數據...")
+    return _combine_research(await _run_tools_async(state['ticker']))
 
-def bull_agent_node(state: AgentState):
-    """[節點 2-A] 多頭分析師 """
-    current_score = state.get("bull_score", 0)
+# --- Bull / Bear 共用流程 ---
+def _draft_context(state: AgentState, side: str):
+    """整理撰寫報告前的上下文；上次已達標則回傳 None (直接沿用舊報告)"""
+    current_score = state.get(f"{side}_score", 0)
     threshold = SystemConfig.PASS_THRESHOLD
-    time.sleep(SystemConfig.API_DELAY + 0.0)
+    last_report = state.get(f"{side}_report")
 
-    if current_score >= threshold and state.get("bull_report"):
-        print(f"📈 [Bull Agent] 上次得分 {current_score} (Pass)，直接沿用舊報告。")
-        return {}
-
-    print("📈 [Bull Agent] 正在撰寫多頭報告...")
-    llm = get_model(temperature=SystemConfig.AGENT_TEMP)
-
-    # feedback of manager and GO TO SEARCH
-    feedback = state.get("bull_feedback")
-    market_data = state["market_data"]
-
-    if feedback:
-        print(f"   ⚠️ 建議Bull: {feedback}")
-        # A. 思考要查什麼
-        query = generate_search_query(state['ticker'], feedback, "Bullish Analyst")
-        # B. 執行搜尋
-        new_info = ResearchService.search_specific(query)
-        # C. 將新資料注入 Context
-        market_data += f"\n\n### 🔍 NEW DATA FOUND (Query: '{query}'):\n{new_info}\n(USE THIS DATA TO FIX YOUR REPORT!)"
-        feedback_context = f"FEEDBACK: {feedback}"
-    else:
-        feedback_context = "None"
+    if current_score >= threshold and last_report:
+        return None
 
     # last report
-    last_report = state.get("bull_report")
-
     REWRITE_THRESHOLD = threshold - 5
     if last_report and current_score < REWRITE_THRESHOLD:
         report_context = "None (Write from scratch based on feedback)"
     else:
         report_context = last_report if last_report else "None (First Draft)"
 
+    return {
+        "feedback": state.get(f"{side}_feedback"),
+        "report_context": report_context,
+        "findings": list(state.get(f"{side}_findings") or []),
+    }
+
+def _add_finding(context, query, new_info):
+    # 近似查詢會拿到同一份快取結果，重複的內容不必再放進 Prompt
+    if all(f["result"] != new_info for f in context["findings"]):
+        context["findings"].append({"query": query, "result": new_info})
+
+def _draft_failed(state: AgentState, side: str, error):
+    """
+    修改稿失敗時沿用上一版報告，並結束這一方的修改迴圈。
+    初稿就失敗則直接拋出：checkpoint 會停在這個節點，--resume 會重跑它，而不是把提示文字當成報告存下來。
+    """
+    if not state.get(f"{side}_report"):
+        print(f"   ❌ [{side.capitalize()} Agent] 初稿產生失敗: {error}")
+        raise error
+    print(f"   ❌ [{side.capitalize()} Agent] 報告產生失敗，沿用上一版並結束這一方的修改: {error}")
+    return {f"{side}_stop_reason": LLM_ERROR}
+
+def _draft_inputs(state: AgentState, context):
+    feedback = context["feedback"]
+    return {
+        "ticker": state["ticker"],
+        "market_data": pack_context(state["market_data"], DEBATE_SECTIONS, context["findings"]),
+        "feedback_context": f"FEEDBACK: {feedback}" if feedback else "None",
+        "report_context": context["report_context"],
+    }
+
+def _bull_chain():
+    llm = get_model(temperature=SystemConfig.AGENT_TEMP)
+
     # [Bull Prompt]
     bull_prompt = ChatPromptTemplate.from_template("""
     # ROLE
@@ -138,53 +266,11 @@ def bull_agent_node(state: AgentState):
     # OUTPUT
     (Generate the Traditional Chinese report below. Do not output pre-computation thoughts.)
     """)
+    return bull_prompt | llm | StrOutputParser()
 
-    chain = bull_prompt | llm | StrOutputParser()
-    report = chain.invoke({
-        "ticker": state["ticker"],
-        "market_data": state["market_data"],
-        "feedback_context": feedback_context,
-        "report_context": report_context
-    })
-    return {"bull_report": report}
-
-def bear_agent_node(state: AgentState):
-    """[節點 2-B] 空頭風險師 """
-    current_score = state.get("bear_score", 0)
-    threshold = SystemConfig.PASS_THRESHOLD
-    time.sleep(SystemConfig.API_DELAY + 0.2)
-
-    if current_score >= threshold and state.get("bear_report"):
-        print(f"📉 [Bear Agent] 上次得分 {current_score} (Pass)，直接沿用舊報告。")
-        return {}
-
-    print("📉 [Bear Agent] 正在撰寫空頭報告...")
+def _bear_chain():
     llm = get_model(temperature=SystemConfig.AGENT_TEMP)
 
-    # feedback of manager and GO TO SEARCH
-    feedback = state.get("bear_feedback")
-    market_data = state["market_data"]
-
-    if feedback:
-        print(f"   ⚠️ 建議Bear: {feedback}")
-        # A. 思考要查什麼
-        query = generate_search_query(state['ticker'], feedback, "Bearish Short-Seller")
-        # B. 執行搜尋
-        new_info = ResearchService.search_specific(query)
-        # C. 注入新資料
-        market_data += f"\n\n### 🔍 NEW DATA FOUND (Query: '{query}'):\n{new_info}\n(USE THIS DATA TO FIX YOUR REPORT!)"
-        feedback_context = f"FEEDBACK: {feedback}"
-    else:
-        feedback_context = "None"
-
-    # last report
-    last_report = state.get("bear_report")
-    REWRITE_THRESHOLD = threshold - 5
-    if last_report and current_score < REWRITE_THRESHOLD:
-        report_context = "None (Write from scratch based on feedback)"
-    else:
-        report_context = last_report if last_report else "None (First Draft)"
-
     # [Bear Prompt]
     bear_prompt = ChatPromptTemplate.from_template("""
     # ROLE
@@ -218,52 +304,125 @@ def bear_agent_node(state: AgentState):
     # OUTPUT
     (Generate the Traditional Chinese report below. Do not output pre-computation thoughts.)
     """)
+    return bear_prompt | llm | StrOutputParser()
 
-    chain = bear_prompt | llm | StrOutputParser()
-    report = chain.invoke({
-        "ticker": state["ticker"],
-        "market_data": state["market_data"],
-        "feedback_context": feedback_context,
-        "report_context": report_context
-    })
-    return {"bear_report": report}
-
-def manager_node(state: AgentState):
-    """[節點 3] 基金經理"""
-    threshold = getattr(SystemConfig, 'PASS_THRESHOLD', 85)
-
-    # 1. 判斷是否需要重審
-    bull_passed = state.get("bull_score", 0) >= threshold
-    bear_passed = state.get("bear_score", 0) >= threshold
-
-    print("\n🤵 [Manager] 正在審核桌上的報告...")
-    time.sleep(SystemConfig.API_DELAY + 5)
-
-    # 2. 動態準備 Prompt
-    if bull_passed:
-        print(f"   ⏩ Bull 已達標 ({state['bull_score']})，跳過審核。")
-        bull_input_content = f"""
-        [SYSTEM NOTE]: This report has ALREADY PASSED with score {state['bull_score']}.
-        CONTENT UNCHANGED.
-        PLEASE OUTPUT SCORE: {state['bull_score']} AND FEEDBACK: "{state['bull_feedback']}".
-        """
-    else:
-        bull_input_content = state['bull_report']
-
-    if bear_passed:
-        print(f"   ⏩ Bear 已達標 ({state['bear_score']})，跳過審核。")
-        bear_input_content = f"""
-        [SYSTEM NOTE]: This report has ALREADY PASSED with score {state['bear_score']}.
-        CONTENT UNCHANGED.
-        PLEASE OUTPUT SCORE: {state['bear_score']} AND FEEDBACK: "{state['bear_feedback']}".
-        """
-    else:
-        bear_input_content = state['bear_report']
+@traced("node", "bull_agent_node")
+def bull_agent_node(state: AgentState):
+    """[節點 2-A] 多頭分析師 """
+    context = _draft_context(state, "bull")
+    if context is None:
+        print(f"📈 [Bull Agent] 上次得分 {state['bull_score']} (Pass)，直接沿用舊報告。")
+        return {}
+
+    print("📈 [Bull Agent] 正在撰寫多頭報告...")
+
+    # feedback of manager and GO TO SEARCH
+    feedback = context["feedback"]
+
+    if feedback:
+        print(f"   ⚠️ 建議Bull: {feedback}")
+        # A. 思考要查什麼
+        query = generate_search_query(state['ticker'], feedback, "Bullish Analyst")
+        # B. 執行搜尋
+        new_info = ResearchService.search_specific(query, state['ticker'])
+        # C. 將新資料注入 Context (存回 state，之後的修改也看得到)
+        _add_finding(context, query, new_info)
+
+    try:
+        report = invoke_chain(_bull_chain(), _draft_inputs(state, context))
+    except Exception as e:
+        return _draft_failed(state, "bull", e)
+    return {"bull_report": report, "bull_findings": context["findings"]}
+
+@traced("node", "bull_agent_node")
+async def abull_agent_node(state: AgentState):
+    context = _draft_context(state, "bull")
+    if context is None:
+        print(f"📈 [Bull Agent] 上次得分 {state['bull_score']} (Pass)，直接沿用舊報告。")
+        return {}
+
+    print("📈 [Bull Agent] 正在撰寫多頭報告...")
+    feedback = context["feedback"]
+
+    if feedback:
+        print(f"   ⚠️ 建議Bull: {feedback}")
+        query = await agenerate_search_query(state['ticker'], feedback, "Bullish Analyst")
+        new_info = await ResearchService.asearch_specific(query, state['ticker'])
+        _add_finding(context, query, new_info)
+
+    try:
+        report = await ainvoke_chain(_bull_chain(), _draft_inputs(state, context))
+    except Exception as e:
+        return _draft_failed(state, "bull", e)
+    return {"bull_report": report, "bull_findings": context["findings"]}
+
+@traced("node", "bear_agent_node")
+def bear_agent_node(state: AgentState):
+    """[節點 2-B] 空頭風險師 """
+    context = _draft_context(state, "bear")
+    if context is None:
+        print(f"📉 [Bear Agent] 上次得分 {state['bear_score']} (Pass)，直接沿用舊報告。")
+        return {}
+
+    print("📉 [Bear Agent] 正在撰寫空頭報告...")
+
+    # feedback of manager and GO TO SEARCH
+    feedback = context["feedback"]
 
-    # 3. 呼叫 LLM
-    llm = get_model(temperature=SystemConfig.MANAGER_TEMP)
-    structured_llm = llm.with_structured_output(ManagerReview)
+    if feedback:
+        print(f"   ⚠️ 建議Bear: {feedback}")
+        # A. 思考要查什麼
+        query = generate_search_query(state['ticker'], feedback, "Bearish Short-Seller")
+        # B. 執行搜尋
+        new_info = ResearchService.search_specific(query, state['ticker'])
+        # C. 注入新資料 (存回 state，之後的修改也看得到)
+        _add_finding(context, query, new_info)
+
+    try:
+        report = invoke_chain(_bear_chain(), _draft_inputs(state, context))
+    except Exception as e:
+        return _draft_failed(state, "bear", e)
+    return {"bear_report": report, "bear_findings": context["findings"]}
+
+@traced("node", "bear_agent_node")
+async def abear_agent_node(state: AgentState):
+    context = _draft_context(state, "bear")
+    if context is None:
+        print(f"📉 [Bear Agent] 上次得分 {state['bear_score']} (Pass)，直接沿用舊報告。")
+        return {}
+
+    print("📉 [Bear Agent] 正在撰寫空頭報告...")
+    feedback = context["feedback"]
 
+    if feedback:
+        print(f"   ⚠️ 建議Bear: {feedback}")
+        query = await agenerate_search_query(state['ticker'], feedback, "Bearish Short-Seller")
+        new_info = await ResearchService.asearch_specific(query, state['ticker'])
+        _add_finding(context, query, new_info)
+
+    try:
+        report = await ainvoke_chain(_bear_chain(), _draft_inputs(state, context))
+    except Exception as e:
+        return _draft_failed(state, "bear", e)
+    return {"bear_report": report, "bear_findings": context["findings"]}
+
+# --- Manager ---
+# 多空各自一條「修改 → 審核」的迴圈，經理每次只審核一方；兩條都結束後由 verdict_node 同時權衡兩份報告下結論。
+def _report_hash(report):
+    return hashlib.sha256((report or "").encode("utf-8")).hexdigest()[:16]
+
+def _needs_review(state: AgentState, side: str) -> bool:
+    """已達標或內容沒變的報告直接沿用上次的分數與回饋"""
+    label = side.capitalize()
+    if state.get(f"{side}_score", 0) >= SystemConfig.PASS_THRESHOLD:
+        print(f"   ⏩ {label} 已達標 ({state[f'{side}_score']})，跳過審核。")
+        return False
+    if state.get(f"{side}_reviewed") == _report_hash(state.get(f"{side}_report")):
+        print(f"   ⏩ {label} 報告沒有變動，沿用上次分數 ({state[f'{side}_score']})。")
+        return False
+    return True
+
+def _review_chain():
     rubric_text = f"""
     **Scoring Rubric:**
     - **Score > {SystemConfig.PASS_THRESHOLD} + 2 (Perfect)**:
@@ -274,20 +433,16 @@ def manager_node(state: AgentState):
 
     - **Score < {SystemConfig.PASS_THRESHOLD} - 2 (Fail)**:
           Data Dump, No Logic, Pure Emotion.
-
-    **Instruction:**
-    If you see [SYSTEM NOTE] saying report passed, JUST COPY that score/feedback.
     """
 
     manager_prompt = ChatPromptTemplate.from_template("""
     You are a Senior Chief Investment Officer (CIO).
-    Your goal is to evaluate if the arguments are **LOGICALLY SOUND** and **DATA-BACKED**.
-    Review reports for {ticker}.
+    Your goal is to evaluate if the argument is **LOGICALLY SOUND** and **DATA-BACKED**.
+    Review the {side} report for {ticker}.
 
-    [Bull Report]: {bull_input}
-    [Bear Report]: {bear_input}
+    [{side} Report]: {report}
 
-    **Task:** Score **EACH** report separately based on the STRICT rubric below.
+    **Task:** Score this report based on the STRICT rubric below.
     """ + rubric_text + """
 
     **CRITICAL INSTRUCTION for 'feedback':**
@@ -299,36 +454,122 @@ def manager_node(state: AgentState):
 
     Output JSON.
     """)
+    structured_llm = get_model(temperature=SystemConfig.MANAGER_TEMP, schema=SideReview)
+    return manager_prompt | structured_llm
+
+def _review_request(state: AgentState, side: str):
+    """準備單方審核的 chain 與輸入；不需要重審時回傳 (None, None)，完全不呼叫 LLM"""
+    print(f"\n🤵 [Manager] 正在審核 {side.capitalize()} 報告...")
+    if not _needs_review(state, side):
+        return None, None
+    inputs = {"ticker": state['ticker'], "side": side.capitalize(), "report": state[f"{side}_report"]}
+    return _review_chain(), inputs
+
+def _review_update(state: AgentState, side: str, result: SideReview, failed=False):
+    # 只寫入這一方的欄位，兩條迴圈同時更新 state 也不會互相覆蓋
+    revisions = state.get(f"{side}_revisions", 0) + 1
+    scores = list(state.get(f"{side}_scores") or [])
+    update = {f"{side}_revisions": revisions, "revision_count": 1}
+    if result is not None:
+        scores.append(result.score)
+        update.update({
+            f"{side}_score": result.score,
+            f"{side}_feedback": result.feedback,
+            f"{side}_reviewed": _report_hash(state.get(f"{side}_report")),
+            f"{side}_scores": scores,
+        })
+    # 記錄迴圈結束的原因 (lane_gate 以同樣的規則決定是否離開)
+    update[f"{side}_stop_reason"] = LLM_ERROR if failed else stop_reason(scores, revisions)
+    return update
+
+def _review_failed(side, error):
+    print(f"   ❌ [Manager] {side.capitalize()} 審核失敗，結束這一方的修改: {error}")
+
+def _review_side(state: AgentState, side: str):
+    if state.get(f"{side}_stop_reason") == LLM_ERROR:
+        # 草稿階段 LLM 已失敗，報告沒有新版本可審
+        return _review_update(state, side, None, failed=True)
+    chain, inputs = _review_request(state, side)
+    try:
+        result = invoke_chain(chain, inputs) if chain else None
+    except Exception as e:
+        _review_failed(side, e)
+        return _review_update(state, side, None, failed=True)
+    return _review_update(state, side, result)
+
+async def _areview_side(state: AgentState, side: str):
+    if state.get(f"{side}_stop_reason") == LLM_ERROR:
+        return _review_update(state, side, None, failed=True)
+    chain, inputs = _review_request(state, side)
+    try:
+        result = await ainvoke_chain(chain, inputs) if chain else None
+    except Exception as e:
+        _review_failed(side, e)
+        return _review_update(state, side, None, failed=True)
+    return _review_update(state, side, result)
+
+@traced("node", "manager_node")
+def bull_review_node(state: AgentState):
+    """[節點 3-A] 基金經理審核多頭報告"""
+    return _review_side(state, "bull")
+
+@traced("node", "manager_node")
+def bear_review_node(state: AgentState):
+    """[節點 3-B] 基金經理審核空頭報告"""
+    return _review_side(state, "bear")
+
+@traced("node", "manager_node")
+async def abull_review_node(state: AgentState):
+    return await _areview_side(state, "bull")
+
+@traced("node", "manager_node")
+async def abear_review_node(state: AgentState):
+    return await _areview_side(state, "bear")
+
+def _verdict_chain():
+    prompt = ChatPromptTemplate.from_template("""
+    You are a Senior Chief Investment Officer (CIO).
+    Both analysts have finished revising their reports on {ticker}.
+    Weigh the two reports **AGAINST EACH OTHER** and make **ONE** final call.
 
-    chain = manager_prompt | structured_llm
-    result = chain.invoke({
-        "ticker": state['ticker'],
-        "bull_input": bull_input_content,
-        "bear_input": bear_input_content
-    })
+    [Bull Report] (Review Score: {bull_score}): {bull_report}
+    [Bear Report] (Review Score: {bear_score}): {bear_report}
 
-    # 4. 確保已通過的人資料不會被改變
-    final_bull_score = state['bull_score'] if bull_passed else result.bull_score
-    final_bull_feedback = state['bull_feedback'] if bull_passed else result.bull_feedback
+    **Task:**
+    1. Decide **Buy**, **Sell** or **Hold**.
+    2. Give ONE sentence in **Traditional Chinese**(繁體中文) explaining which side's evidence outweighs the other and why.
+    3. A higher review score means a better-argued report, not automatically the right one. Judge the evidence.
 
-    final_bear_score = state['bear_score'] if bear_passed else result.bear_score
-    final_bear_feedback = state['bear_feedback'] if bear_passed else result.bear_feedback
+    Output JSON.
+    """)
+    return prompt | get_model(temperature=SystemConfig.MANAGER_TEMP, schema=Verdict)
 
-    # print(f"   📝 評分結果 - Bull: {result.bull_score}, Bear: {result.bear_score}")
+def _verdict_inputs(state: AgentState):
     return {
-        "bull_score": result.bull_score,
-        "bull_feedback": result.bull_feedback,
-        "bear_score": result.bear_score,
-        "bear_feedback": result.bear_feedback,
-        "final_decision": result.final_decision,
-        "revision_count": state["revision_count"] + 1
+        "ticker": state["ticker"],
+        "bull_report": state.get("bull_report"), "bull_score": state.get("bull_score", "N/A"),
+        "bear_report": state.get("bear_report"), "bear_score": state.get("bear_score", "N/A"),
     }
 
-def storyteller_node(state: AgentState):
-    """[節點 4] 說書人 (負責把資料變成 IG 懶人包)"""
-    print("\n🎭 [Storyteller] 正在製作 IG 財經懶人包...")
-    time.sleep(SystemConfig.API_DELAY)
-    llm = get_model(temperature=0.7) # 溫度高一點，讓他有創意
+@traced("node", "verdict_node")
+def verdict_node(state: AgentState):
+    """
+    [節點 3-C] 兩條迴圈都結束後，經理同時權衡多空報告，做出唯一的最終結論。
+    失敗時不給替代結論，讓錯誤往外拋：checkpoint 停在這裡，--resume 只需重跑這一步。
+    """
+    print("\n🤵 [Manager] 正在權衡多空報告，做出最終結論...")
+    result = invoke_chain(_verdict_chain(), _verdict_inputs(state))
+    return {"final_decision": result.final_decision}
+
+@traced("node", "verdict_node")
+async def averdict_node(state: AgentState):
+    print("\n🤵 [Manager] 正在權衡多空報告，做出最終結論...")
+    result = await ainvoke_chain(_verdict_chain(), _verdict_inputs(state))
+    return {"final_decision": result.final_decision}
+
+# --- Storyteller ---
+def _storyteller_chain():
+    llm = get_model(temperature=0.7, stream=True) # 溫度高一點，讓他有創意；串流模式下逐 token 輸出
 
     # 給說書人所有的原料
     prompt = ChatPromptTemplate.from_template("""
@@ -383,13 +624,40 @@ def storyteller_node(state: AgentState):
 
     **Tone:** Fun, engaging, use many emojis. NO complex jargon without explanation.
     """)
+    return prompt | llm | StrOutputParser()
 
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({
-        "market_data": state["market_data"], # 這裡面現在有歷史股價和 Profile
+def _storyteller_inputs(state: AgentState):
+    return {
+        "market_data": pack_context(state["market_data"], STORY_SECTIONS), # 歷史股價、Profile 與指標
         "bull_report": state.get("bull_report"),
         "bear_report": state.get("bear_report"),
         "final_decision": state.get("final_decision")
-    })
+    }
+
+def _fallback_story(state: AgentState, error):
+    """說書人失敗時直接輸出多空原始報告 (報告與結論都是真的結果，只是少了排版)"""
+    print(f"   ❌ [Storyteller] 產生失敗，改為輸出多空原始報告: {error}")
+    return (
+        "> ⚠️ 說書人暫時無法使用，以下為多空分析師的原始報告。\n\n"
+        f"## 📈 Bull Report\n\n{state.get('bull_report') or 'N/A'}\n\n"
+        f"## 📉 Bear Report\n\n{state.get('bear_report') or 'N/A'}"
+    )
+
+@traced("node", "storyteller_node")
+def storyteller_node(state: AgentState):
+    """[節點 4] 說書人 (負責把資料變成 IG 懶人包)"""
+    print("\n🎭 [Storyteller] 正在製作 IG 財經懶人包...")
+    try:
+        result = invoke_chain(_storyteller_chain(), _storyteller_inputs(state))
+    except Exception as e:
+        result = _fallback_story(state, e)
+    return {"story_content": result}
 
+@traced("node", "storyteller_node")
+async def astoryteller_node(state: AgentState):
+    print("\n🎭 [Storyteller] 正在製作 IG 財經懶人包...")
+    try:
+        result = await ainvoke_chain(_storyteller_chain(), _storyteller_inputs(state))
+    except Exception as e:
+        result = _fallback_story(state, e)
     return {"story_content": result}
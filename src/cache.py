@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+# --- 通用快取 (TTL + LRU Cache) ---
+class TTLCache:
+    """
+    執行緒安全的記憶體快取。
+    每筆資料有存活時間 (TTL)，超過容量時淘汰最久沒用到的 (LRU)。
+    """
+    def __init__(self, ttl: float, maxsize: int = 128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()   # key -> (寫入時間, value)
+        self._lock = threading.RLock()
+        self._key_locks = {}
+
+    def _is_fresh(self, stored_at):
+        return (time.monotonic() - stored_at) < self.ttl
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            stored_at, value = entry
+            if not self._is_fresh(stored_at):
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """快取沒有就呼叫 loader，同一個 key 同時只會載入一次"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = loader()
+                self.set(key, value)
+            return value
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -9,10 +9,76 @@ class SystemConfig:
 
     PASS_THRESHOLD = 88  # 及格門檻
     MAX_REVISIONS = 3    # 最大修改次數
+    EARLY_EXIT = True    # 分數停滯或不可能達標時提早結束修改
+    CONVERGENCE_WINDOW = 2     # 觀察最近幾輪的進步幅度
+    CONVERGENCE_EPSILON = 2    # 這幾輪合計進步少於此分數視為停滯
     MANAGER_TEMP = 0.1   # 經理的溫度
     AGENT_TEMP = 0.7     # 分析師的溫度
 
-    API_DELAY = 10
+    # 各外部來源的限速額度 (只有額度用完才會等待，取代固定的 time.sleep)
+    # max_concurrent: 全域同時進行中的呼叫上限 (批次模式多檔共用)
+    RATE_LIMITS = {
+        "llm": {"requests_per_minute": 30, "tokens_per_minute": 6000, "max_concurrent": 4},
+        "yfinance": {"requests_per_minute": 120, "max_concurrent": 8},
+        "ddg": {"requests_per_minute": 20, "max_concurrent": 2},
+    }
+
+    # 外部呼叫的逾時 / 重試 / 斷路器 (src/resilience.py)。timeout 為單次嘗試的秒數；
+    # LLM 的逾時由 HTTP client 控制 (LLM_HTTP_TIMEOUT)，不另外開執行緒計時
+    # rate_limited: 每次嘗試前先在計時之外申請 RATE_LIMITS 的額度 (LLM 由模型層依 token 數申請)
+    RESILIENCE = {
+        "llm": {"timeout": None, "retries": 2, "backoff": 1.0, "failure_threshold": 5, "reset_timeout": 30,
+                "rate_limited": False},
+        "yfinance": {"timeout": 15, "retries": 2, "backoff": 0.5, "failure_threshold": 5, "reset_timeout": 30,
+                     "rate_limited": True},
+        "ddg": {"timeout": 10, "retries": 1, "backoff": 1.0, "failure_threshold": 3, "reset_timeout": 60,
+                "rate_limited": True},
+    }
+
+    LLM_HTTP_TIMEOUT = 60        # 單次 LLM 請求的讀取逾時 (秒)
+    YFINANCE_HTTP_TIMEOUT = 10   # yfinance 價格請求的 socket 逾時，比單次嘗試的逾時短，卡住的連線會自己斷開
+    LLM_MAX_CONNECTIONS = 10     # 共用 HTTP 連線池大小
+    LLM_KEEPALIVE_EXPIRY = 120   # 閒置連線保留秒數
+
+    LLM_CACHE_MODE = "off"       # LLM 回應快取: off / rw (讀寫) / ro (唯讀)
+    LLM_CACHE_MODES = ("off", "rw", "ro")
+    LLM_CACHE_PATH = ".cache/llm_cache.sqlite"
+    LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+    CHECKPOINT_ENABLED = True    # 每個節點完成後存檔，可用 --resume 續跑
+    CHECKPOINT_PATH = ".cache/checkpoints.sqlite"
+
+    TRACE_ENABLED = True         # 每次執行輸出 JSON-lines trace
+    TRACE_DIR = ".cache/traces"  # trace 屬於執行紀錄，不與報告放在一起 (.cache/ 不納入版本控制)
+
+    BATCH_WORKERS = 4            # 批次模式同時分析幾檔股票
+    BULK_CHUNK_SIZE = 10         # 批次預先下載股價時，每次 yf.download 的 symbol 數 (逐檔下載，逾時與限速額度依此放大)
+
+    STARTUP_BUDGET_S = 0.25      # `import main` 的冷啟動上限 (秒)，benchmark 會檢查
+
+    SERVICE_HOST = "127.0.0.1"   # --serve 常駐服務的位址
+    SERVICE_PORT = 8765
+    SERVICE_QUEUE_SIZE = 32      # 排隊中的 job 上限，超過時拒絕 (HTTP 429)
+
+    PRICE_STORE_ENABLED = True   # 日 K 存在本機，之後只下載缺少的交易日
+    PRICE_STORE_DIR = ".cache/prices"
+    PRICE_REFRESH_TTL = 15 * 60  # 當天下載的最後一筆 K 棒可能還沒收盤，超過此秒數就重新下載
+    PRICE_CACHE_TTL = 15 * 60    # 記憶體中日 K 的存活秒數 (常駐服務之後的 job 會重新檢查本機股價庫)
+    PRICE_CACHE_SIZE = 512       # 記憶體中最多保留幾檔的日 K
+
+    PARALLEL_RESEARCH = True     # Researcher 是否平行呼叫各數據工具
+    RESEARCH_WORKERS = 6         # 平行抓資料的最大執行緒數
+    TOOL_TIMEOUT = 30            # 單一數據工具的逾時秒數 (下限；實際至少為 yfinance / DDG 的完整重試預算)
+
+    CONTEXT_TOKEN_BUDGET = 1500  # 每個 Prompt 的 market data 上限 (粗估 token)，超過時裁切較長的 section
+
+    SEARCH_CACHE_TTL = 60 * 60   # 搜尋結果的存活秒數
+    SEARCH_CACHE_SIZE = 256      # 搜尋快取最多保留幾筆查詢
+    SEARCH_SIMILARITY = 0.8      # 同一檔股票的查詢字詞相似度 (Jaccard) 達此值即沿用舊結果
+    SHARED_RESEARCH = True       # 批次內不同 ticker 提到相同公司的相近查詢共用搜尋結果
+
+    SNAPSHOT_TTL = 6 * 60 * 60   # 基本面/持股快照的存活秒數 (約一個交易日)
+    SNAPSHOT_CACHE_SIZE = 128    # 快照快取最多保留幾檔股票
     MODEL_NAME = "meta-llama/llama-4-maverick-17b-128e-instruct"
     # qwen/qwen3-32b
     # llama-3.3-70b-versatile
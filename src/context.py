@@ -0,0 +1,54 @@
+from .config import SystemConfig
+
+# --- Prompt 上下文打包 (Token-Budget Context Packer) ---
+# market_data 以「section 名稱 -> 內容」存在 state，
+# 每個 Prompt 只挑自己需要的 section，並在 token 上限內裁切後才組成文字。
+
+CHARS_PER_TOKEN = 4   # 與 ratelimit.estimate_tokens 的粗估一致
+
+def as_sections(market_data) -> dict:
+    """舊版 checkpoint 的 market_data 是一整段字串，視為單一 section"""
+    if isinstance(market_data, dict):
+        return market_data
+    return {"Market Data": market_data} if market_data else {}
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 3)] + "..."
+
+def fit_budget(sections, budget_tokens: int):
+    """
+    sections: [(標題, 內容)]。總長度超過上限時平均分配額度：
+    短的 section 完整保留，剩下的額度由較長的 section 平分後截斷。
+    """
+    limit = budget_tokens * CHARS_PER_TOKEN
+    if sum(len(text) for _, text in sections) <= limit:
+        return sections
+    allowed = {}
+    remaining = limit
+    pending = sorted(range(len(sections)), key=lambda i: len(sections[i][1]))
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        allowed[i] = min(len(sections[i][1]), share)
+        remaining -= allowed[i]
+    return [(title, _truncate(text, allowed[i])) for i, (title, text) in enumerate(sections)]
+
+def pack_context(market_data, include=None, findings=(), budget_tokens=None) -> str:
+    """
+    組出 Prompt 用的 market data 文字。
+    - include: 要放入的 section 名稱 (None 代表全部)，依此順序排列
+    - findings: 修改時主動搜尋到的新資料 [{"query", "result"}]
+    """
+    sections = as_sections(market_data)
+    names = [n for n in include if n in sections] if include is not None else list(sections)
+    if include is not None and not names:
+        names = list(sections)   # 舊版 checkpoint 沒有對應的 section 時整段保留
+    packed = [(f"[{name}]", str(sections[name])) for name in names]
+    packed += [(f"### 🔍 NEW DATA FOUND (Query: '{f['query']}'):", f["result"]) for f in findings]
+    packed = fit_budget(packed, budget_tokens or SystemConfig.CONTEXT_TOKEN_BUDGET)
+
+    lines = [f"{title}: {text}" for title, text in packed[:len(names)]]
+    lines += [f"\n{title}\n{text}\n(USE THIS DATA TO FIX YOUR REPORT!)" for title, text in packed[len(names):]]
+    return "\n".join(lines)
@@ -0,0 +1,34 @@
+from .config import SystemConfig
+
+# --- 收斂控制 (Convergence Controller) ---
+# 依照單方的分數軌跡判斷修改迴圈是否該結束，並回傳結束原因：
+# - "passed":        達到 PASS_THRESHOLD
+# - "max_revisions": 審核次數用完
+# - "stalled":       最近 CONVERGENCE_WINDOW 輪的進步小於 CONVERGENCE_EPSILON
+# - "unreachable":   以目前最大的單輪進步幅度推估，剩下的輪數也到不了門檻
+# 提早結束的兩條規則都要先看過超過 CONVERGENCE_WINDOW 輪分數才判斷，
+# 單一輪持平或小退步 (例如搜尋結果下一輪才進來) 不會讓迴圈結束。
+# - "llm_error":     撰寫或審核的 LLM 呼叫在重試後仍失敗 (由 agents 直接寫入 state，不由分數判斷)
+
+LLM_ERROR = "llm_error"
+
+def stop_reason(scores, revisions):
+    """scores: 該方歷次審核分數 (舊到新)；revisions: 已審核次數。回傳 None 代表繼續修改"""
+    threshold = SystemConfig.PASS_THRESHOLD
+    if scores and scores[-1] >= threshold:
+        return "passed"
+    if revisions > SystemConfig.MAX_REVISIONS:
+        return "max_revisions"
+    window = SystemConfig.CONVERGENCE_WINDOW
+    if not SystemConfig.EARLY_EXIT or len(scores) <= window:
+        return None
+
+    if scores[-1] - scores[-1 - window] < SystemConfig.CONVERGENCE_EPSILON:
+        return "stalled"
+
+    # 樂觀推估：之後每輪都以目前看過最大的進步幅度前進
+    remaining = SystemConfig.MAX_REVISIONS + 1 - revisions
+    best_gain = max(max(b - a for a, b in zip(scores, scores[1:])), 0)
+    if scores[-1] + best_gain * remaining < threshold:
+        return "unreachable"
+    return None
@@ -1,50 +1,96 @@
+import os
+import sqlite3
 from langgraph.graph import StateGraph, END
 from .state import AgentState
-from .agents import research_node, bull_agent_node, bear_agent_node, manager_node, storyteller_node
+from .agents import (
+    research_node, bull_agent_node, bear_agent_node, bull_review_node, bear_review_node,
+    verdict_node, storyteller_node,
+    aresearch_node, abull_agent_node, abear_agent_node, abull_review_node, abear_review_node,
+    averdict_node, astoryteller_node,
+)
 from .config import SystemConfig
+from .convergence import stop_reason, LLM_ERROR
 
-# --- 路由邏輯 (Parallel Router) ---
-def quality_gate(state: AgentState):
+# --- 路由邏輯 (Lane Router) ---
+def lane_gate(state: AgentState, side: str):
     """
-    決定下一步：
-    經理審核通過後，交給「說書人」製作懶人包。
+    決定單方 (bull / bear) 迴圈的下一步：
+    收斂控制判斷該結束 (達標、次數耗盡、分數停滯或已不可能達標) 或 LLM 失敗就離開迴圈，
+    否則帶著 Feedback 回去重寫。另一方的進度不影響這個判斷。
     """
-    bull_score = state.get("bull_score", 0)
-    bear_score = state.get("bear_score", 0)
-    revision_count = state["revision_count"]
+    scores = state.get(f"{side}_scores") or []
+    if state.get(f"{side}_stop_reason") == LLM_ERROR or stop_reason(scores, state.get(f"{side}_revisions", 0)):
+        return f"{side}_done"
+    return f"{side}_agent"
 
-    pass_threshold = SystemConfig.PASS_THRESHOLD
-    max_revisions = SystemConfig.MAX_REVISIONS
+def bull_gate(state: AgentState):
+    return lane_gate(state, "bull")
 
-    # 1. 審核通過
-    if bull_score >= pass_threshold and bear_score >= pass_threshold:
-        # print(f"✅ [Router] 雙方皆達高標 ({pass_threshold}+) -> 進入說書人 (Storyteller) 環節")
-        return "storyteller_node" # 指向說書人
+def bear_gate(state: AgentState):
+    return lane_gate(state, "bear")
 
-    # 2. 強制結束條件
-    elif revision_count > max_revisions:
-        # print("🛑 [Router] 修改次數耗盡 -> 強制進入說書人 (Storyteller) 環節")
-        return "storyteller_node" # 指向說書人
-
-    # 3. 未達標繼續寫
-    else:
-        # print(f"🔄 [Router] 未達標 (Bull:{bull_score}, Bear:{bear_score}) -> 打回重練")
-        return ["bull_agent", "bear_agent"]
+def lane_done(state: AgentState):
+    """迴圈出口 (不更新 state)，兩邊都到這裡才會進入 verdict"""
+    return {}
 
 # --- 建立圖形 ---
-def get_graph():
+def _build_graph(researcher, bull, bear, bull_review, bear_review, verdict, storyteller, checkpointer=None):
     wf = StateGraph(AgentState)
-    wf.add_node("researcher", research_node)
-    wf.add_node("bull_agent", bull_agent_node)
-    wf.add_node("bear_agent", bear_agent_node)
-    wf.add_node("manager", manager_node)
-    wf.add_node("storyteller_node", storyteller_node)
-    
+    wf.add_node("researcher", researcher)
+    wf.add_node("bull_agent", bull)
+    wf.add_node("bear_agent", bear)
+    wf.add_node("bull_review", bull_review)
+    wf.add_node("bear_review", bear_review)
+    wf.add_node("bull_done", lane_done)
+    wf.add_node("bear_done", lane_done)
+    wf.add_node("manager", verdict)
+    wf.add_node("storyteller_node", storyteller)
+
     wf.set_entry_point("researcher")
     wf.add_edge("researcher", "bull_agent")
     wf.add_edge("researcher", "bear_agent")
-    wf.add_edge("bull_agent", "manager")
-    wf.add_edge("bear_agent", "manager")
-    wf.add_conditional_edges("manager", quality_gate)
+    # 兩條獨立的「修改 → 審核」迴圈
+    wf.add_edge("bull_agent", "bull_review")
+    wf.add_edge("bear_agent", "bear_review")
+    wf.add_conditional_edges("bull_review", bull_gate, ["bull_agent", "bull_done"])
+    wf.add_conditional_edges("bear_review", bear_gate, ["bear_agent", "bear_done"])
+    # Join：等兩條迴圈都結束
+    wf.add_edge(["bull_done", "bear_done"], "manager")
+    wf.add_edge("manager", "storyteller_node")
     wf.add_edge("storyteller_node", END)
-    return wf.compile()
+    return wf.compile(checkpointer=checkpointer)
+
+def get_graph(checkpointer=None):
+    """
+    checkpointer: 傳入 LangGraph 的 checkpointer (例如 get_checkpointer())，
+    每個節點完成後都會存檔，失敗時可從最後完成的節點繼續。
+    """
+    return _build_graph(research_node, bull_agent_node, bear_agent_node, bull_review_node, bear_review_node,
+                        verdict_node, storyteller_node, checkpointer=checkpointer)
+
+def aget_graph(checkpointer=None):
+    """非同步版本：所有節點都是 async，需搭配 ainvoke / astream 使用"""
+    return _build_graph(aresearch_node, abull_agent_node, abear_agent_node, abull_review_node, abear_review_node,
+                        averdict_node, astoryteller_node, checkpointer=checkpointer)
+
+# --- 檢查點 (Checkpointing) ---
+def _ensure_checkpoint_dir(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+def get_checkpointer(path=None):
+    """本機 SQLite checkpointer (同步版)"""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    path = path or SystemConfig.CHECKPOINT_PATH
+    _ensure_checkpoint_dir(path)
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+def aget_checkpointer(path=None):
+    """本機 SQLite checkpointer (非同步版)，需以 async with 使用"""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    path = path or SystemConfig.CHECKPOINT_PATH
+    _ensure_checkpoint_dir(path)
+    return AsyncSqliteSaver.from_conn_string(path)
+
+def thread_config(ticker, run_id):
+    """以 ticker + run id 作為 checkpoint 的 thread_id"""
+    return {"configurable": {"thread_id": f"{ticker}:{run_id}"}}
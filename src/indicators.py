@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# --- 技術指標引擎 (Vectorized Technical Indicators) ---
+# 所有函式的輸入都是 (日期 × 股票) 的 2D 陣列，一次算完整個觀察清單。
+# 缺值 (NaN) 代表該股票在那天沒有資料 (例如上市較晚)，不會影響其他欄位。
+
+def _as_2d(values):
+    arr = np.asarray(values, dtype=float)
+    return arr[:, None] if arr.ndim == 1 else arr
+
+def _rolling_windows(x, window):
+    """回傳 (T-window+1, N, window) 的滑動視窗 (不複製資料)"""
+    return np.lib.stride_tricks.sliding_window_view(x, window, axis=0)
+
+def sma(close, window):
+    """簡單移動平均；前 window-1 天為 NaN"""
+    x = _as_2d(close)
+    out = np.full_like(x, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = _rolling_windows(x, window).mean(axis=-1)
+    return out
+
+def rolling_std(close, window):
+    x = _as_2d(close)
+    out = np.full_like(x, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = _rolling_windows(x, window).std(axis=-1)
+    return out
+
+def _ewm(x, alpha, min_periods=1):
+    """
+    遞迴式指數平滑 (等同 pandas ewm(adjust=False))，中間缺值沿用前一日。
+    時間軸只能逐日推進，但每一步都是整排股票一起算。
+    """
+    x = _as_2d(x)
+    valid = ~np.isnan(x)
+    # 開頭缺值先填入第一個有效值，遞迴從該值起算；中間缺值 forward fill
+    filled = pd.DataFrame(x).ffill().bfill().to_numpy()
+    out = np.empty_like(filled)
+    state = filled[0].copy()
+    out[0] = state
+    for t in range(1, len(filled)):
+        state += alpha * (filled[t] - state)
+        out[t] = state
+    out[np.cumsum(valid, axis=0) < min_periods] = np.nan
+    return out
+
+def ema(close, span):
+    return _ewm(close, 2.0 / (span + 1), min_periods=span)
+
+def wilder(values, period):
+    """Wilder 平滑 (alpha = 1/period)，RSI 與 ATR 使用"""
+    return _ewm(values, 1.0 / period, min_periods=period)
+
+def rsi(close, period=14):
+    x = _as_2d(close)
+    delta = np.full_like(x, np.nan)
+    delta[1:] = np.diff(x, axis=0)
+    gain = np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None))
+    loss = np.where(np.isnan(delta), np.nan, np.clip(-delta, 0, None))
+    avg_gain, avg_loss = wilder(gain, period), wilder(loss, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        out = 100 - 100 / (1 + rs)
+    # 完全沒有下跌時 RSI = 100
+    return np.where((avg_loss == 0) & (avg_gain > 0), 100.0, out)
+
+def macd(close, fast=12, slow=26, signal=9):
+    """回傳 (macd, signal, histogram)"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = _ewm(line, 2.0 / (signal + 1), min_periods=signal)
+    return line, signal_line, line - signal_line
+
+def bollinger(close, window=20, k=2.0):
+    """回傳 (upper, middle, lower)"""
+    middle = sma(close, window)
+    std = rolling_std(close, window)
+    return middle + k * std, middle, middle - k * std
+
+def atr(high, low, close, period=14):
+    h, l, c = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = np.full_like(c, np.nan)
+    prev_close[1:] = c[:-1]
+    # fmax 會忽略 NaN (第一天沒有前收盤時 TR = high - low)
+    true_range = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+    return wilder(true_range, period)
+
+def compute_indicators(close, high=None, low=None):
+    """
+    一次算出所有指標，回傳 {名稱: (日期 × 股票) 陣列}。
+    沒有 high/low 時略過 ATR。
+    """
+    close = _as_2d(close)
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_upper, bb_middle, bb_lower = bollinger(close)
+    result = {
+        "close": close,
+        "sma_20": sma(close, 20),
+        "sma_50": sma(close, 50),
+        "ema_20": ema(close, 20),
+        "rsi_14": rsi(close, 14),
+        "macd": macd_line,
+        "macd_signal": macd_signal,
+        "macd_hist": macd_hist,
+        "bb_upper": bb_upper,
+        "bb_middle": bb_middle,
+        "bb_lower": bb_lower,
+    }
+    if high is not None and low is not None:
+        result["atr_14"] = atr(high, low, close, 14)
+    return result
+
+def latest(values):
+    """每支股票最後一個有效值 (1D 陣列)"""
+    x = _as_2d(values)
+    valid = ~np.isnan(x)
+    last = np.where(valid.any(axis=0), len(x) - 1 - np.argmax(valid[::-1], axis=0), 0)
+    return np.where(valid.any(axis=0), x[last, np.arange(x.shape[1])], np.nan)
+
+def price_matrix(frames: dict, column="Close"):
+    """
+    把多檔的日 K DataFrame 對齊成 (日期 × 股票) 的 DataFrame。
+    各交易所時區不同，統一成日期；中間休市造成的缺口沿用前一日收盤。
+    """
+    columns = {}
+    for ticker, df in frames.items():
+        series = df[column]
+        index = series.index.tz_localize(None) if getattr(series.index, "tz", None) else series.index
+        columns[ticker] = series.set_axis(index.normalize())
+    return pd.concat(columns, axis=1).sort_index().ffill()
+
+def technical_summary(indicators, column=0):
+    """產生 get_technicals 原本的文字輸出"""
+    current_price = latest(indicators["close"])[column]
+    sma_50 = latest(indicators["sma_50"])[column]
+    rsi_value = latest(indicators["rsi_14"])[column]
+
+    trend = "Bullish (Above SMA50)" if current_price > sma_50 else "Bearish (Below SMA50)"
+    rsi_signal = "Overbought (>70)" if rsi_value > 70 else "Oversold (<30)" if rsi_value < 30 else "Neutral"
+    return f"RSI(14): {rsi_value:.2f} [{rsi_signal}], Price vs SMA50: {trend} (Price: {current_price:.2f}, SMA50: {sma_50:.2f})"
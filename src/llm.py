@@ -0,0 +1,42 @@
+from langchain_groq import ChatGroq
+from .ratelimit import limited, alimited, estimate_tokens
+from .telemetry import span, record_llm_call, record_llm_result, record_llm_chunk
+
+# --- 限速的 Groq 模型 (Throttled ChatGroq) ---
+# 由 tools.get_model 第一次建立模型時才載入，避免 import tools 就得載入 langchain_groq。
+
+class ThrottledChatGroq(ChatGroq):
+    """
+    只在真正送出 API 請求時才向 llm 限速器申請額度。
+    命中 LLM 回應快取時不會進到 _generate，因此重播不受限速影響。
+    """
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = estimate_tokens("".join(str(m.content) for m in messages))
+        with span("llm", self.model_name), limited("llm", tokens=tokens):
+            record_llm_call()
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return record_llm_result(result)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = estimate_tokens("".join(str(m.content) for m in messages))
+        with span("llm", self.model_name):
+            async with alimited("llm", tokens=tokens):
+                record_llm_call()
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                return record_llm_result(result)
+
+    # 串流版本 (只有 get_model(stream=True) 的模型在 LangGraph messages 串流下會走到這裡)
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = estimate_tokens("".join(str(m.content) for m in messages))
+        with span("llm", self.model_name), limited("llm", tokens=tokens):
+            record_llm_call()
+            for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield record_llm_chunk(chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = estimate_tokens("".join(str(m.content) for m in messages))
+        with span("llm", self.model_name):
+            async with alimited("llm", tokens=tokens):
+                record_llm_call()
+                async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    yield record_llm_chunk(chunk)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
+from .config import SystemConfig
+
+# --- LLM 回應快取 (Content-Addressed LLM Cache) ---
+class LLMResponseCache(BaseCache):
+    """
+    以 (模型設定, prompt) 的雜湊為 key，把 LLM 回應存到本機 SQLite。
+    llm_string 由 LangChain 產生，已包含 model / temperature / 結構化輸出的 schema。
+
+    mode:
+    - "off": 不讀也不寫
+    - "rw":  命中就直接回傳，未命中則呼叫 API 後寫入
+    - "ro":  只讀取既有快取，不寫入 (重播 / 離線測試用)
+    超過 max_bytes 時淘汰最久沒被讀取的資料。
+    """
+    MODES = SystemConfig.LLM_CACHE_MODES
+
+    def __init__(self, path: str, max_bytes: int, mode: str = "off"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def set_mode(self, mode: str):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode} (expected one of {self.MODES})")
+        self.mode = mode
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON llm_cache (accessed)")
+        return self._conn
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        if self.mode == "off":
+            return None
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.mode == "rw":
+                db.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+        messages = messages_from_dict(json.loads(row[0]))
+        return [ChatGeneration(message=m) for m in messages]
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        if self.mode != "rw":
+            return
+        key = self._key(prompt, llm_string)
+        value = json.dumps([message_to_dict(g.message) for g in return_val], ensure_ascii=False)
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db):
+        """總大小超過上限時，從最久沒用到的開始刪"""
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY accessed ASC").fetchall():
+            db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, **kwargs):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM llm_cache")
+            db.commit()
+
+
+llm_cache = LLMResponseCache(
+    path=SystemConfig.LLM_CACHE_PATH,
+    max_bytes=SystemConfig.LLM_CACHE_MAX_BYTES,
+    mode=SystemConfig.LLM_CACHE_MODE,
+)
@@ -0,0 +1,173 @@
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import markdown
+
+# --- 輸出階段 (Output Stage) ---
+# 報告 HTML 與趨勢圖都在這裡產生。批次模式下交給 process pool 執行：
+# matplotlib 是 CPU-bound 且非 thread-safe，放到獨立 process 後主流程送出就能繼續跑下一檔。
+# 工作 process 只會拿到可 pickle 的資料 (state 的報告欄位、已算好的價格 DataFrame)，不會重新下載。
+
+REPORT_FIELDS = ("ticker", "market_data", "final_decision", "story_content")
+
+_figure = None   # 每個 process 重複使用同一個 Figure，不必每張圖重建
+
+def render_markdown(text):
+    # extensions=['extra'] 可以支援表格和更豐富的格式
+    return markdown.markdown(text, extensions=['extra'])
+
+def render_report(state, html_content, in_progress=False):
+    """組出完整的 HTML 報告 (in_progress 時頁面會自動重新整理)"""
+    ticker = state['ticker']
+    domain = f"{ticker.split('.')[0].lower()}.com"
+    try:
+        # 嘗試抓取比較精確的網域
+        match = re.search(r'https?://(www\.)?([a-zA-Z0-9-]+\.[a-zA-Z]+)', str(state.get('market_data','')))
+        if match: domain = match.group(2)
+    except: pass
+
+    img_src = f"https://www.google.com/s2/favicons?domain={domain}&sz=128"
+    refresh = '<meta http-equiv="refresh" content="2">' if in_progress else ""
+
+    return f"""
+    <html>
+    <head>
+        <meta charset="utf-8">
+        {refresh}
+        <style>
+            body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; max-width: 800px; margin: 40px auto; padding: 20px; background-color: #f4f4f9; color: #333; line-height: 1.6; }}
+            .container {{ background: #ffffff; padding: 40px; border-radius: 15px; box-shadow: 0 4px 15px rgba(0,0,0,0.1); }}
+
+            /* 標題樣式 */
+            h1 {{ color: #2c3e50; border-bottom: 2px solid #eee; padding-bottom: 10px; }}
+            h2 {{ color: #e67e22; margin-top: 30px; }}
+            h3 {{ color: #2980b9; margin-top: 25px; }}
+
+            /* 重點文字 */
+            strong {{ color: #c0392b; }}
+
+            /* 列表樣式 */
+            ul {{ padding-left: 20px; }}
+            li {{ margin-bottom: 8px; }}
+
+            /* 頂部 Header */
+            .header {{ display: flex; align-items: center; margin-bottom: 30px; }}
+            .header img {{ width: 64px; height: 64px; margin-right: 20px; border-radius: 10px; }}
+            .source {{ color: #7f8c8d; font-size: 0.9em; }}
+
+            /* 經理結論區塊 */
+            .verdict {{ background-color: #ecf0f1; padding: 15px; border-left: 5px solid #bdc3c7; margin-top: 30px; border-radius: 4px; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <img src="{img_src}" onerror="this.src='https://via.placeholder.com/64'">
+                <div>
+                    <h1 style="margin:0; border:none;">{ticker} Analysis Report</h1>
+                    <span class="source">Source: {domain}</span>
+                </div>
+            </div>
+
+            {html_content}
+
+            <div class="verdict">
+                <h3>🤵 Manager's Verdict</h3>
+                <p>{state.get('final_decision')}</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+def write_report(output_dir, name, html):
+    """先寫暫存檔再取代，瀏覽器重新整理時不會讀到寫一半的檔案；name 通常是 ticker"""
+    path = f"{output_dir}/report_{name}.html"
+    with open(path + ".tmp", "w", encoding="utf-8") as f: f.write(html)
+    os.replace(path + ".tmp", path)
+    return path
+
+def save_report(state, output_dir, name=None):
+    """將結果生成為 HTML (Markdown 渲染修復版)"""
+    path = write_report(output_dir, name or state['ticker'], render_report(state, render_markdown(state['story_content'])))
+    return f"✅ HTML Report saved: {path}"
+
+def _chart_figure():
+    global _figure
+    if _figure is None:
+        # 直接建立 Figure 而不經過 pyplot：不會碰到 GUI backend，也不會留在 pyplot 的全域圖表清單裡
+        from matplotlib.figure import Figure
+        _figure = Figure(figsize=(10, 5))
+    _figure.clear()
+    return _figure
+
+def save_chart(ticker, df, output_dir, name=None):
+    """畫出收盤價與 SMA20 並存檔；df 為已抓好的價格 (含 Close、SMA20 欄位)，name 預設為 ticker"""
+    if df is None or df.empty:
+        return None
+    fig = _chart_figure()
+    ax = fig.add_subplot()
+    ax.plot(df.index, df['Close'], label='Close')
+    ax.plot(df.index, df['SMA20'], label='SMA20', linestyle='--')
+    ax.set_title(f"{ticker} Trend")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    path = f"{output_dir}/chart_{name or ticker}.png"
+    fig.savefig(path)
+    return f"✅ Chart saved: {path}"
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+class OutputStage:
+    """
+    報告與圖表的輸出佇列。
+    workers > 0 時每份報告、每張圖都是 process pool 裡的一個工作，submit() 立即返回；
+    workers = 0 時直接在呼叫端執行 (單檔模式不值得啟動額外的 process)。
+    close() 會等待所有已送出的工作寫完。
+    """
+    def __init__(self, output_dir, workers=0):
+        self.output_dir = output_dir
+        self._pool = None
+        if workers > 0:
+            # spawn：主流程此時已有多個執行緒，fork 可能複製到被鎖住的 lock
+            self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, state, chart=None, prefix="", name=None):
+        """
+        送出一檔的報告與圖表；chart 為 save_chart 需要的價格 DataFrame。
+        name 為輸出檔名 (預設 ticker)，同一檔可能同時有多份結果時 (常駐服務) 由呼叫端給不重複的名稱。
+        """
+        report = {k: state.get(k) for k in REPORT_FIELDS}
+        jobs = [(save_report, report, self.output_dir, name),
+                (save_chart, state["ticker"], chart, self.output_dir, name)]
+        for fn, *args in jobs:
+            if self._pool is None:
+                self._report(prefix, fn.__name__, fn, args)
+            else:
+                future = self._pool.submit(fn, *args)
+                future.add_done_callback(lambda f, name=fn.__name__: self._report(prefix, name, f.result))
+
+    def _report(self, prefix, name, fn, args=()):
+        try:
+            message = fn(*args)
+        except Exception as e:
+            message = f"⚠️ {name} failed: {e}"
+        if message:
+            print(f"{prefix}{message}")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
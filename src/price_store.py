@@ -0,0 +1,157 @@
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+# --- 本機股價庫 (Local Columnar Price Store) ---
+class PriceStore:
+    """
+    每個 symbol 一個只追加 (append-only) 的二進位檔，內容為固定寬度的日 K 紀錄。
+    讀取時以 np.memmap 對應整個檔案，依日期二分搜尋後直接切片，只有用到的區間才會被讀進記憶體。
+    更新時從倒數第二筆已存日期 (settled_date) 起覆寫：最後一筆可能是盤中未收盤的 K 棒，
+    倒數第二筆則一定已收盤，拿來檢查價格是否被回溯調整。
+    """
+    COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+    RECORD = np.dtype([("date", "<i8")] + [(c, "<f8") for c in COLUMNS])
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._^-]", "_", symbol) + ".bin")
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _records(self, symbol):
+        """整個檔案的唯讀 memmap (檔案不存在或為空時回傳 None)"""
+        path = self._path(symbol)
+        if not os.path.exists(path) or os.path.getsize(path) < self.RECORD.itemsize:
+            return None
+        return np.memmap(path, dtype=self.RECORD, mode="r")
+
+    def last_date(self, symbol: str):
+        """最後一筆已存的交易日 (沒有資料則為 None)"""
+        with self._symbol_lock(symbol):
+            records = self._records(symbol)
+            if records is None:
+                return None
+            return pd.Timestamp(int(records["date"][-1]))
+
+    def settled_date(self, symbol: str):
+        """倒數第二筆已存的交易日 (寫入時已有更新的 K 棒，價格一定已收盤)；不足兩筆則為 None"""
+        with self._symbol_lock(symbol):
+            records = self._records(symbol)
+            if records is None or len(records) < 2:
+                return None
+            return pd.Timestamp(int(records["date"][-2]))
+
+    def updated_at(self, symbol: str):
+        """最後一次寫入的時間 (epoch 秒)；沒有資料則為 None"""
+        path = self._path(symbol)
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def window(self, symbol: str, start=None) -> pd.DataFrame:
+        """讀取 start (含) 之後的日 K；只複製切出來的區間"""
+        with self._symbol_lock(symbol):
+            records = self._records(symbol)
+            if records is None:
+                return pd.DataFrame(columns=list(self.COLUMNS), index=pd.DatetimeIndex([], name="Date"))
+            dates = records["date"]
+            first = int(np.searchsorted(dates, pd.Timestamp(start).value)) if start is not None else 0
+            rows = records[first:]
+            index = pd.DatetimeIndex(np.array(rows["date"], dtype="datetime64[ns]"), name="Date")
+            return pd.DataFrame({c: np.array(rows[c]) for c in self.COLUMNS}, index=index)
+
+    @staticmethod
+    def _dates(frame):
+        index = frame.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        # 只保留日期，避免不同來源的時間部分 (00:00 / 時區) 造成同一天重複
+        return index.normalize().to_numpy(dtype="datetime64[ns]").view("i8")
+
+    def consistent(self, symbol: str, frame: pd.DataFrame, tolerance: float = 1e-4) -> bool:
+        """
+        新資料與已存資料重疊那天 (已收盤的 K 棒) 的收盤價是否接得起來。
+        價格是還原權值 (auto_adjust) 後的數字，拆股或除息都會讓之前的收盤價整段回溯調整，
+        差距超過 tolerance 代表本機資料混到新舊兩種調整，需要整段重抓。
+        """
+        if frame is None or frame.empty or "Close" not in frame:
+            return True
+        with self._symbol_lock(symbol):
+            records = self._records(symbol)
+            if records is None:
+                return True
+            # 最後一筆可能是盤中的未收盤價格，本來就會被覆寫，不拿來比對
+            settled = records[:-1]
+            first = self._dates(frame)[0]
+            pos = int(np.searchsorted(settled["date"], first))
+            if pos >= len(settled) or settled["date"][pos] != first:
+                return True
+            stored = float(settled["Close"][pos])
+        fetched = float(frame["Close"].iloc[0])
+        if not stored or np.isnan(stored) or np.isnan(fetched):
+            return True
+        return abs(fetched / stored - 1) <= tolerance
+
+    def _to_records(self, frame):
+        new = np.empty(len(frame), dtype=self.RECORD)
+        new["date"] = self._dates(frame)
+        for c in self.COLUMNS:
+            new[c] = frame[c].to_numpy(dtype="f8") if c in frame else np.nan
+        return new[np.argsort(new["date"], kind="stable")]
+
+    def replace(self, symbol: str, frame: pd.DataFrame) -> int:
+        """
+        以 frame 取代整個 symbol 的資料 (價格回溯調整後整段重抓時使用)。
+        先寫暫存檔再 os.replace，寫入途中失敗也不會留下半份資料或把舊資料刪掉。
+        """
+        if frame is None or frame.empty:
+            return 0
+        new = self._to_records(frame)
+        with self._symbol_lock(symbol):
+            os.makedirs(self.root, exist_ok=True)
+            path = self._path(symbol)
+            with open(path + ".tmp", "wb") as f:
+                f.write(new.tobytes())
+            os.replace(path + ".tmp", path)
+        return len(new)
+
+    def update(self, symbol: str, frame: pd.DataFrame) -> int:
+        """
+        寫入新下載的日 K：與既有資料重疊的部分 (從 frame 的第一天起) 先截掉再追加。
+        回傳寫入的筆數。
+        """
+        if frame is None or frame.empty:
+            return 0
+        new = self._to_records(frame)
+
+        with self._symbol_lock(symbol):
+            os.makedirs(self.root, exist_ok=True)
+            path = self._path(symbol)
+            records = self._records(symbol)
+            keep = 0
+            if records is not None:
+                keep = int(np.searchsorted(records["date"], new["date"][0]))
+                del records
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.truncate(keep * self.RECORD.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(new.tobytes())
+        return len(new)
+
+    def clear(self, symbol: str = None):
+        """刪除單一 symbol (不指定則全部) 的本機資料"""
+        if symbol is not None:
+            with self._symbol_lock(symbol):
+                if os.path.exists(self._path(symbol)):
+                    os.remove(self._path(symbol))
+        elif os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if name.endswith(".bin"):
+                    os.remove(os.path.join(self.root, name))
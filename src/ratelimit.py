@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from .config import SystemConfig
+from .telemetry import record_sleep
+
+# --- 速率限制 (Token Bucket Rate Limiter) ---
+class TokenBucket:
+    """
+    經典 Token Bucket：容量為每分鐘額度，依時間連續補充。
+    採「預約」制：先扣額度，不足的部分換算成需要等待的秒數。
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0    # 每秒補充量
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """扣除 amount，回傳需要等待的秒數 (0 代表不用等)"""
+        amount = min(amount, self.capacity)
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= amount
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    單一來源 (例如 LLM / yfinance / DuckDuckGo) 的限速器。
+    同時限制 requests/min 與 tokens/min，只有額度真的用完時才會等待。
+    max_concurrent 另外限制同時進行中的呼叫數 (批次模式的全域上限)。
+    執行緒與 asyncio 皆可安全使用。
+    """
+    SLOT_POLL_MIN = 0.005   # 非同步等待名額時的輪詢間隔 (秒)，逐步拉長到 SLOT_POLL_MAX
+    SLOT_POLL_MAX = 0.05
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float = None,
+                 max_concurrent: int = None):
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int, requests: int = 1) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._requests.reserve(requests, now)
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            return wait
+
+    def acquire(self, tokens: int = 0, requests: int = 1) -> float:
+        """同步版本：必要時阻塞等待，回傳實際等待秒數；requests 為這次呼叫實際送出的請求數"""
+        wait = self._reserve(tokens, requests)
+        if wait > 0:
+            record_sleep(wait)
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 0, requests: int = 1) -> float:
+        """非同步版本：等待時不佔用 event loop"""
+        wait = self._reserve(tokens, requests)
+        if wait > 0:
+            record_sleep(wait)
+            await asyncio.sleep(wait)
+        return wait
+
+    @contextmanager
+    def slot(self, tokens: int = 0, requests: int = 1):
+        """佔用一個並行名額並申請額度，離開 with 區塊時釋放名額"""
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            self.acquire(tokens, requests)
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int = 0, requests: int = 1):
+        """
+        非同步版本：名額與同步版共用同一個 semaphore (全域上限一致)，
+        但以不阻塞的 acquire + asyncio.sleep 輪詢，等待時不佔用執行緒；被取消的等待者也不會事後拿走名額。
+        """
+        if self._slots is not None:
+            delay = self.SLOT_POLL_MIN
+            while not self._slots.acquire(blocking=False):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.SLOT_POLL_MAX)
+        try:
+            await self.aacquire(tokens, requests)
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+
+# 共用的限速器，依來源分開計算額度
+rate_limiters = {
+    source: RateLimiter(**limits) for source, limits in SystemConfig.RATE_LIMITS.items()
+}
+
+def throttle(source: str, tokens: int = 0) -> float:
+    """對指定來源申請一次呼叫額度"""
+    return rate_limiters[source].acquire(tokens)
+
+async def athrottle(source: str, tokens: int = 0) -> float:
+    return await rate_limiters[source].aacquire(tokens)
+
+def limited(source: str, tokens: int = 0, requests: int = 1):
+    """with limited("llm", tokens): ... 同時套用限速與並行上限；批次下載以 requests 計入實際的請求數"""
+    return rate_limiters[source].slot(tokens, requests)
+
+def alimited(source: str, tokens: int = 0, requests: int = 1):
+    return rate_limiters[source].aslot(tokens, requests)
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數 (約 4 個字元一個 token)"""
+    return max(1, len(text) // 4)
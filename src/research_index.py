@@ -0,0 +1,122 @@
+import re
+import threading
+from contextlib import contextmanager
+from .config import SystemConfig
+
+# --- 批次研究索引 (Batch Research Index) ---
+# 同一個批次裡的相關股票 (例如 NVDA / AMD / AVGO / TSM) 會產生大量重疊的搜尋：
+# "NVDA vs AMD AI market share" 與 "AMD vs NVDA AI chip market share" 只是措辭不同。
+# SearchCache 的近似比對限定在同一檔股票內，避免只差代號的查詢互相誤用；
+# 這裡改以「查詢提到哪些批次內的公司」(實體) 為準：實體集合完全相同、其餘字詞又夠相近，才跨 ticker 沿用。
+
+# 公司全名裡不具辨識度的字詞，比對別名時略過
+_NAME_STOPWORDS = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc",
+    "holdings", "holding", "group", "sa", "nv", "ag", "se", "the", "and", "class",
+}
+
+
+class _Entry:
+    def __init__(self, entities, tokens):
+        self.entities = entities
+        self.tokens = tokens
+        self.result = None
+        self.ready = threading.Event()   # 搜尋進行中的查詢，近似的查詢會等它完成
+
+
+class ResearchIndex:
+    """
+    只在 batch() 區塊內生效；區塊外 fetch_or_reuse() 直接呼叫 fetch。
+    - 實體：批次內的 ticker，以及從基本面快照學到的公司名稱別名 (例如 "nvidia" -> NVDA)
+    - 搜尋結果依 (實體集合, 字詞) 記錄，不含任何實體的查詢 (產業/總經) 也能跨 ticker 共用
+    """
+    def __init__(self, similarity: float):
+        self.similarity = similarity
+        self.reused = 0
+        self._active = False
+        self._aliases = {}   # 別名字詞組 (tuple) -> ticker
+        self._entries = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def batch(self, tickers):
+        if not SystemConfig.SHARED_RESEARCH:
+            yield self
+            return
+        with self._lock:
+            self._active = True
+            self.reused = 0
+            for ticker in tickers:
+                self._aliases[(ticker.lower(),)] = ticker
+                self._aliases[(ticker.split(".")[0].lower(),)] = ticker
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._active = False
+                self._aliases.clear()
+                self._entries.clear()
+
+    def add_snapshot(self, ticker: str, info: dict):
+        """以快照中的公司名稱登記別名 (只限批次內的 ticker)"""
+        with self._lock:
+            if not self._active or ticker not in self._aliases.values():
+                return
+            for field in ("shortName", "longName"):
+                words = tuple(w for w in re.findall(r"[a-z0-9]+", str(info.get(field) or "").lower())
+                              if w not in _NAME_STOPWORDS)
+                if words:
+                    self._aliases[words] = ticker
+
+    def _normalize(self, query: str):
+        """回傳 (實體集合, 字詞集合)；別名字詞換成 ticker，讓 "Nvidia" 與 "NVDA" 視為同一個字"""
+        tokens = set(re.findall(r"\w+", query.lower()))
+        entities = set()
+        for words, ticker in self._aliases.items():
+            if tokens.issuperset(words):
+                tokens.difference_update(words)
+                entities.add(ticker)
+        return frozenset(entities), frozenset(tokens | {t.lower() for t in entities})
+
+    def _match(self, entities, tokens):
+        best, best_score = None, self.similarity
+        for entry in self._entries:
+            if entry.entities != entities:
+                continue
+            score = len(tokens & entry.tokens) / len(tokens | entry.tokens) if tokens else 0.0
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def fetch_or_reuse(self, query: str, fetch):
+        """批次內已有 (或正在搜尋) 實體相同且相近的查詢就沿用其結果，否則呼叫 fetch() 並登記"""
+        match = entry = None
+        with self._lock:
+            if self._active:
+                entities, tokens = self._normalize(query)
+                match = self._match(entities, tokens)
+                if match is None:
+                    entry = _Entry(entities, tokens)
+                    self._entries.append(entry)
+        if match is None and entry is None:
+            return fetch()
+        if match is not None:
+            match.ready.wait()
+            if match.result is not None:
+                with self._lock:
+                    self.reused += 1
+                return match.result
+            return fetch()   # 原本的搜尋失敗，改為自己搜尋
+
+        try:
+            entry.result = fetch()
+            return entry.result
+        finally:
+            entry.ready.set()
+            if entry.result is None:
+                with self._lock:
+                    if entry in self._entries:
+                        self._entries.remove(entry)
+
+
+research_index = ResearchIndex(similarity=SystemConfig.SEARCH_SIMILARITY)
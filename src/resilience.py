@@ -0,0 +1,184 @@
+import asyncio
+import contextlib
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from .config import SystemConfig
+from .ratelimit import limited, alimited
+from .telemetry import record_retry, record_sleep
+
+# --- 外部呼叫韌性層 (Timeout / Retry / Circuit Breaker) ---
+# 每個來源 (llm / yfinance / ddg) 各自設定於 SystemConfig.RESILIENCE：
+# - timeout: 單次嘗試的上限秒數 (卡住的 socket 不會拖住整個 Node)
+# - retries / backoff: 失敗後以指數退避 + 隨機抖動重試
+# - failure_threshold / reset_timeout: 連續失敗達門檻就「斷路」，之後的呼叫直接失敗，
+#   reset_timeout 秒後放行一次試探，成功才恢復。呼叫端據此改用快取或舊資料。
+# - rate_limited: 每次嘗試先取得限速額度再開始計時，排隊等額度不會被當成來源逾時。
+# 一次呼叫內依序送出多個請求的批次操作 (例如 yf.download 多檔) 改用 call_batch：
+# 單次逾時與限速額度都依請求數放大。
+
+
+class CircuitOpenError(Exception):
+    """來源已斷路，呼叫沒有真的送出"""
+
+
+class CircuitBreaker:
+    def __init__(self, source, failure_threshold, reset_timeout):
+        self.source = source
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if now - self.opened_at >= self.reset_timeout else "open"
+
+    def before_call(self):
+        """斷路中直接拋出 CircuitOpenError；半開時只放行一個試探呼叫"""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(f"{self.source} circuit open (retry after {self.reset_timeout}s)")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    print(f"   🔌 [Circuit] {self.source} 連續失敗 {self.failures} 次，暫停呼叫 {self.reset_timeout}s")
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+# 需要逾時的同步呼叫在這裡執行；逾時的執行緒無法強制中止，但呼叫端可以先往下走
+_timeout_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="resilience")
+
+def _settings(source):
+    return SystemConfig.RESILIENCE.get(source, {})
+
+def breaker(source) -> CircuitBreaker:
+    with _breakers_lock:
+        if source not in _breakers:
+            settings = _settings(source)
+            _breakers[source] = CircuitBreaker(source, settings.get("failure_threshold", 5),
+                                               settings.get("reset_timeout", 30))
+        return _breakers[source]
+
+def reset():
+    """清除所有斷路器狀態 (測試與 benchmark 用)"""
+    with _breakers_lock:
+        _breakers.clear()
+
+def budget(source):
+    """
+    call() 在全部重試失敗前最多花多少秒 (每次嘗試都逾時 + 最長的退避抖動，不含限速排隊)；
+    沒有設定單次逾時的來源回傳 None。
+    """
+    settings = _settings(source)
+    if not settings.get("timeout"):
+        return None
+    retries = settings.get("retries", 0)
+    backoff = sum(settings.get("backoff", 0.5) * (2 ** attempt) * 1.5 for attempt in range(retries))
+    return settings["timeout"] * (retries + 1) + backoff
+
+def _slot(source, settings, size=1):
+    return limited(source, requests=size) if settings.get("rate_limited") else contextlib.nullcontext()
+
+def _aslot(source, settings, size=1):
+    return alimited(source, requests=size) if settings.get("rate_limited") else contextlib.nullcontext()
+
+def _backoff(settings, attempt):
+    base = settings.get("backoff", 0.5) * (2 ** attempt)
+    return base * random.uniform(0.5, 1.5)
+
+def _run_with_timeout(fn, args, kwargs, timeout):
+    if not timeout:
+        return fn(*args, **kwargs)
+    # copy_context 讓執行緒內的呼叫仍計入目前的 telemetry span
+    future = _timeout_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise TimeoutError(f"timed out after {timeout}s")
+
+def call(source, fn, *args, **kwargs):
+    """以 source 的逾時 / 重試 / 斷路設定呼叫 fn；全部失敗時拋出最後一個例外"""
+    return _call(source, 1, fn, args, kwargs)
+
+def call_batch(source, size, fn, *args, **kwargs):
+    """
+    fn 會依序送出 size 個請求 (例如 yf.download(threads=False) 逐檔下載)：
+    單次逾時放大為 size 倍，限速額度也以 size 個請求計算，其餘與 call() 相同。
+    """
+    return _call(source, max(1, size), fn, args, kwargs)
+
+def _call(source, size, fn, args, kwargs):
+    settings = _settings(source)
+    circuit = breaker(source)
+    retries = settings.get("retries", 0)
+    timeout = settings.get("timeout")
+    timeout = timeout * size if timeout else timeout
+    for attempt in range(retries + 1):
+        circuit.before_call()
+        try:
+            # 逾時只計算真正送出的請求；逾時後名額隨即釋放，卡住的執行緒不會一直佔著並行上限
+            with _slot(source, settings, size):
+                result = _run_with_timeout(fn, args, kwargs, timeout)
+        except Exception:
+            circuit.record_failure()
+            if attempt == retries:
+                raise
+            record_retry()
+            delay = _backoff(settings, attempt)
+            record_sleep(delay)
+            time.sleep(delay)
+        else:
+            circuit.record_success()
+            return result
+
+async def acall(source, fn, *args, **kwargs):
+    """非同步版本：fn 為 coroutine function，逾時以 asyncio.wait_for 控制"""
+    settings = _settings(source)
+    circuit = breaker(source)
+    retries = settings.get("retries", 0)
+    timeout = settings.get("timeout")
+    for attempt in range(retries + 1):
+        circuit.before_call()
+        try:
+            async with _aslot(source, settings):
+                result = await asyncio.wait_for(fn(*args, **kwargs), timeout) if timeout else await fn(*args, **kwargs)
+        except Exception:
+            circuit.record_failure()
+            if attempt == retries:
+                raise
+            record_retry()
+            delay = _backoff(settings, attempt)
+            record_sleep(delay)
+            await asyncio.sleep(delay)
+        else:
+            circuit.record_success()
+            return result
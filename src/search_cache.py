@@ -0,0 +1,94 @@
+import re
+import threading
+from .cache import TTLCache
+from .config import SystemConfig
+
+# --- 搜尋結果快取 (Search Result Cache) ---
+class SearchCache:
+    """
+    DuckDuckGo 搜尋結果的 TTL 快取。
+    查詢先正規化成「小寫字詞集合」當 key，字詞順序、大小寫與標點不同都算同一個查詢；
+    找不到時再於同一個 scope (通常是 ticker) 內找字詞集合 Jaccard 相似度 >= similarity 的舊查詢直接沿用。
+    scope 只限制「近似」比對，避免不同 ticker 只差代號的查詢互相誤用。
+    """
+    def __init__(self, ttl: float, maxsize: int, similarity: float):
+        self._cache = TTLCache(ttl=ttl, maxsize=maxsize)
+        self._stale = TTLCache(ttl=float("inf"), maxsize=maxsize)   # 過期的結果，搜尋失敗時備用
+        self.similarity = similarity
+        self._scopes = {}   # scope -> {key: 字詞集合}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def tokens(query: str) -> frozenset:
+        return frozenset(re.findall(r"\w+", query.lower()))
+
+    @staticmethod
+    def _key(tokens) -> str:
+        return " ".join(sorted(tokens))
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _similar(self, tokens, scope):
+        """同 scope 內最相近且尚未過期的查詢 key (沒有則為 None)"""
+        if not tokens:
+            return None
+        best, best_score = None, self.similarity
+        with self._lock:
+            entries = self._scopes.get(scope, {})
+            for key, other in list(entries.items()):
+                if key not in self._cache:
+                    del entries[key]
+                    continue
+                score = len(tokens & other) / len(tokens | other)
+                if score >= best_score:
+                    best, best_score = key, score
+        return best
+
+    def get_or_search(self, query: str, search, scope=None):
+        """回傳快取的結果；沒有相同或近似的查詢才呼叫 search()"""
+        tokens = self.tokens(query)
+        key = self._key(tokens)
+        result = self._cache.get(key)
+        if result is not None:
+            self._count("hits")
+            return result
+
+        near = self._similar(tokens, scope)
+        result = self._cache.get(near) if near is not None else None
+        if result is not None:
+            self._count("near_hits")
+            return result
+
+        self._count("misses")
+        result = self._cache.get_or_load(key, search)
+        self._stale.set(key, result)
+        with self._lock:
+            self._scopes.setdefault(scope, {})[key] = tokens
+        return result
+
+    def stale(self, query: str):
+        """同一個查詢最後一次成功的結果 (不論是否過期)，沒有則為 None"""
+        return self._stale.get(self._key(self.tokens(query)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "near_hits": self.near_hits, "misses": self.misses}
+
+    def clear(self):
+        self._cache.clear()
+        self._stale.clear()
+        with self._lock:
+            self._scopes.clear()
+            self.hits = self.near_hits = self.misses = 0
+
+
+search_cache = SearchCache(
+    ttl=SystemConfig.SEARCH_CACHE_TTL,
+    maxsize=SystemConfig.SEARCH_CACHE_SIZE,
+    similarity=SystemConfig.SEARCH_SIMILARITY,
+)
@@ -0,0 +1,173 @@
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .config import SystemConfig
+
+# --- 常駐分析服務 (Analysis Service) ---
+# 一個長駐的本機 HTTP 服務：graph 只編譯一次，LLM client、快取與輸出 process 都保持暖機。
+# ticker 以 job 的形式進入有上限的佇列，由固定數量的 worker 執行，並發度集中在這裡控制。
+#
+#   POST /jobs          {"ticker": "NVDA"}  -> 202 {"id": ..., "status": "queued"}；佇列滿時 429
+#   GET  /jobs                              -> 所有保留中的 job
+#   GET  /jobs/<id>                         -> 單一 job 的狀態與結果
+#   GET  /health                            -> worker 數、佇列長度
+
+# ticker 會出現在報告、圖表與 trace 的檔名裡，只接受一般的股票代號字元 (例如 BRK-B、2330.TW、^GSPC)
+TICKER_PATTERN = re.compile(r"^[A-Z0-9.^=-]{1,15}$")
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, ticker):
+        self.id = uuid.uuid4().hex[:12]
+        self.ticker = ticker
+        self.status = "queued"      # queued -> running -> done / failed
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "id": self.id, "ticker": self.ticker, "status": self.status,
+            "submitted": self.submitted, "started": self.started, "finished": self.finished,
+            "result": self.result, "error": self.error,
+        }
+
+
+class AnalysisService:
+    """
+    analyze(ticker, job_id) 由呼叫端提供 (main.py 以暖機好的 graph 執行並輸出報告)，回傳可 JSON 序列化的結果。
+    完成的 job 最多保留 history 筆，超過時淘汰最舊的。
+    """
+    def __init__(self, analyze, workers, queue_size, history=200):
+        self.analyze = analyze
+        self.workers = workers
+        self.history = history
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"analysis-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, ticker):
+        """ticker 不是合法的股票代號時拋出 ValueError；佇列已滿時拋出 QueueFull"""
+        ticker = ticker.strip().upper()
+        if not TICKER_PATTERN.match(ticker):
+            raise ValueError(f"invalid ticker: {ticker[:32]!r}")
+        job = Job(ticker)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFull(f"queue is full ({self._queue.maxsize} jobs waiting)")
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def jobs(self):
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def health(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+        return {"workers": self.workers, "queued": self._queue.qsize(), "running": running}
+
+    def _evict(self):
+        """只淘汰已結束的 job，排隊中與執行中的一定保留"""
+        finished = [jid for jid, job in self._jobs.items() if job.status in ("done", "failed")]
+        for jid in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[jid]
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            job.status, job.started = "running", time.time()
+            try:
+                job.result = self.analyze(job.ticker, job.id)
+                job.status = "done"
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "failed"
+            finally:
+                job.finished = time.time()
+                self._queue.task_done()
+
+
+def _handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if parts == ["health"]:
+                return self._send(200, service.health())
+            if parts == ["jobs"]:
+                return self._send(200, service.jobs())
+            if len(parts) == 2 and parts[0] == "jobs":
+                job = service.get(parts[1])
+                return self._send(200, job) if job else self._send(404, {"error": "job not found"})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                return self._send(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                ticker = str(json.loads(self.rfile.read(length) or b"{}").get("ticker") or "").strip()
+            except (ValueError, AttributeError):
+                return self._send(400, {"error": "body must be JSON like {\"ticker\": \"NVDA\"}"})
+            if not ticker:
+                return self._send(400, {"error": "missing ticker"})
+            try:
+                job = service.submit(ticker)
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+            except QueueFull as e:
+                return self._send(429, {"error": str(e)})
+            self._send(202, job.to_dict())
+
+        def log_message(self, format, *args):
+            pass   # 進度已由 worker 印出，不重複輸出存取紀錄
+
+    return Handler
+
+
+def serve(service, host=None, port=None):
+    """啟動 worker 與 HTTP 服務，阻塞直到 Ctrl+C"""
+    host = host or SystemConfig.SERVICE_HOST
+    port = port or SystemConfig.SERVICE_PORT
+    service.start()
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    print(f"🛰️ Analysis service listening on http://{host}:{port} (workers={service.workers})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
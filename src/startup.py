@@ -0,0 +1,51 @@
+import os
+import re
+import subprocess
+import sys
+from .config import SystemConfig
+
+# --- 冷啟動量測 (Startup Profile) ---
+# 在全新的直譯器以 `python -X importtime -c "import main"` 匯入，
+# 讀出每個模組的累計載入時間；main 本身的累計時間就是 CLI 的冷啟動成本。
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+def import_profile(module="main"):
+    """回傳 (module 的累計秒數, [(直接 import 的模組, 累計秒數)] 由慢到快)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    total, children, depth = 0.0, [], None
+    # 輸出是後序：子模組先列出，最後才是 module 本身
+    for line in reversed(proc.stderr.splitlines()):
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)) / 1e6, len(match.group(3)), match.group(4)
+        if depth is None:
+            if name == module and indent == 0:
+                total, depth = cumulative, 0
+            continue
+        if indent == 0:
+            break
+        if indent == 2:
+            children.append((name, cumulative))
+    return total, sorted(children, key=lambda kv: -kv[1])
+
+def measure_startup(module="main", runs=3):
+    """取多次量測的最小值，降低磁碟快取與排程造成的雜訊"""
+    return min(import_profile(module)[0] for _ in range(runs))
+
+def print_startup_profile(module="main", top=15):
+    """印出各模組載入時間，回傳是否在 STARTUP_BUDGET_S 之內"""
+    total, children = import_profile(module)
+    budget = SystemConfig.STARTUP_BUDGET_S
+    print(f"⏱️ Startup Profile: import {module} = {total:.3f}s (budget {budget:.2f}s)")
+    for name, seconds in children[:top]:
+        print(f"   {name:<40} {seconds:>8.3f}s")
+    ok = total <= budget
+    print("✅ Within startup budget" if ok else "❌ Startup budget exceeded")
+    return ok
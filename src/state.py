@@ -1,26 +1,41 @@
-from typing import TypedDict
+import operator
+from typing import Annotated, TypedDict
 from pydantic import BaseModel, Field
 
 class AgentState(TypedDict):
     ticker: str             # 股票代碼
-    market_data: str        # 搜集到的原始數據
+    market_data: dict       # 搜集到的原始數據 (section 名稱 -> 內容)
     bull_report: str        # 多頭報告
     bear_report: str        # 空頭報告
+    bull_findings: list     # 多頭修改時主動搜尋到的資料 [{"query", "result"}]
+    bear_findings: list     # 空頭修改時主動搜尋到的資料
 
     # 分開記錄兩者的分數與回饋
     bull_score: int
     bull_feedback: str
     bear_score: int
     bear_feedback: str
+    bull_reviewed: str      # 上次評分時報告內容的雜湊，沒變就不必重審
+    bear_reviewed: str
+
+    # 多空各自的審核次數 (兩條修改迴圈互不等待)
+    bull_revisions: int
+    bear_revisions: int
+    bull_scores: list       # 歷次審核分數，供收斂控制判斷
+    bear_scores: list
+    bull_stop_reason: str   # 迴圈結束原因 (passed / max_revisions / stalled / unreachable)
+    bear_stop_reason: str
 
     final_decision: str     # 最終決策
-    revision_count: int     # 修改次數計數器
+    revision_count: Annotated[int, operator.add]  # 兩邊審核次數合計
 
     story_content: str
 
-class ManagerReview(BaseModel):
-    bull_score: int = Field(description="Score 0-100")
-    bull_feedback: str = Field(description="Feedback")
-    bear_score: int = Field(description="Score 0-100")
-    bear_feedback: str = Field(description="Feedback")
-    final_decision: str = Field(description="Final decision")
+class SideReview(BaseModel):
+    """經理對單方報告的審核結果"""
+    score: int = Field(description="Score 0-100")
+    feedback: str = Field(description="Feedback")
+
+class Verdict(BaseModel):
+    """兩條迴圈都結束後，經理同時權衡多空報告的最終結論"""
+    final_decision: str = Field(description="Buy/Sell/Hold and a one-sentence reason weighing both reports")
@@ -0,0 +1,189 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from .config import SystemConfig
+
+# --- 執行追蹤 (Run Telemetry) ---
+# 每次執行 (ticker + run id) 產生一份 JSON-lines trace，
+# 記錄每個 Node / 工具的耗時、限速等待時間、LLM token 用量與重試次數。
+
+_current_run = contextvars.ContextVar("telemetry_run", default=None)
+_active_spans = contextvars.ContextVar("telemetry_spans", default=())
+_lock = threading.Lock()
+
+METRICS = ("sleep_s", "prompt_tokens", "completion_tokens", "llm_calls", "retries")
+
+
+class Span:
+    """一段被追蹤的區間 (Node、工具或 LLM 呼叫)"""
+    def __init__(self, kind, name, parent=None):
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.metrics = dict.fromkeys(METRICS, 0)
+        self.http_attempts = 0
+
+
+class RunTrace:
+    """單次執行的追蹤紀錄，span 結束時即時寫入 JSON-lines 檔"""
+    def __init__(self, ticker, run_id, path=None):
+        self.ticker = ticker
+        self.run_id = run_id
+        self.path = path
+        self.records = []
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        record = {"ts": time.time(), "ticker": self.ticker, "run_id": self.run_id, **record}
+        with _lock:
+            self.records.append(record)
+            if self._file:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._file.flush()
+
+    def summary(self):
+        """依 (kind, name) 彙總所有 span"""
+        rows = {}
+        for r in self.records:
+            if r.get("event") != "span":
+                continue
+            row = rows.setdefault((r["kind"], r["name"]), {"calls": 0, "wall_s": 0.0, "errors": 0, **dict.fromkeys(METRICS, 0)})
+            row["calls"] += 1
+            row["wall_s"] += r["wall_s"]
+            row["errors"] += 1 if r.get("error") else 0
+            for m in METRICS:
+                row[m] += r[m]
+        return rows
+
+    def print_summary(self):
+        rows = self.summary()
+        if not rows:
+            return
+        print(f"\n⏱️ Run Trace Summary ({self.ticker} / {self.run_id})")
+        print(f"   {'Kind':<6} {'Name':<28} {'Calls':>5} {'Wall(s)':>8} {'Sleep(s)':>8} {'PromptTok':>9} {'ComplTok':>8} {'LLM':>4} {'Retry':>5}")
+        for (kind, name), row in sorted(rows.items(), key=lambda kv: -kv[1]["wall_s"]):
+            print(f"   {kind:<6} {name[:28]:<28} {row['calls']:>5} {row['wall_s']:>8.2f} {row['sleep_s']:>8.2f} "
+                  f"{row['prompt_tokens']:>9} {row['completion_tokens']:>8} {row['llm_calls']:>4} {row['retries']:>5}")
+        if self.path:
+            print(f"   📄 Trace: {self.path}")
+
+    def close(self):
+        self.write({"event": "summary", "spans": [
+            {"kind": kind, "name": name, **row} for (kind, name), row in self.summary().items()
+        ]})
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+@contextmanager
+def start_run(ticker, run_id=None, trace_dir=None):
+    """開始追蹤一次執行，區塊內所有 span 都會記錄到這份 trace"""
+    run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+    path = None
+    if SystemConfig.TRACE_ENABLED:
+        path = os.path.join(trace_dir or SystemConfig.TRACE_DIR, f"trace_{ticker}_{run_id}.jsonl")
+    trace = RunTrace(ticker, run_id, path)
+    token = _current_run.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_run.reset(token)
+        trace.close()
+
+
+@contextmanager
+def span(kind, name):
+    """追蹤一段區間；沒有進行中的 run 時不做任何事"""
+    trace = _current_run.get()
+    if trace is None:
+        yield None
+        return
+    parents = _active_spans.get()
+    current = Span(kind, name, parents[-1].name if parents else None)
+    token = _active_spans.set(parents + (current,))
+    start = time.monotonic()
+    error = None
+    try:
+        yield current
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _active_spans.reset(token)
+        trace.write({
+            "event": "span", "kind": kind, "name": name, "parent": current.parent,
+            "wall_s": round(time.monotonic() - start, 4), **current.metrics, "error": error,
+        })
+
+
+def traced(kind, name=None):
+    """裝飾器版本的 span，同時支援一般函式與 async 函式"""
+    def decorator(fn):
+        label = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind, label):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _add(metric, amount):
+    """累加到所有進行中的 span (巢狀的 Node 與工具都會計入)"""
+    if not amount:
+        return
+    with _lock:
+        for active in _active_spans.get():
+            active.metrics[metric] += amount
+
+def record_sleep(seconds):
+    _add("sleep_s", round(seconds, 4))
+
+def record_tokens(prompt_tokens, completion_tokens):
+    _add("prompt_tokens", prompt_tokens or 0)
+    _add("completion_tokens", completion_tokens or 0)
+
+def record_llm_call():
+    _add("llm_calls", 1)
+
+def record_retry():
+    _add("retries", 1)
+
+def record_http_attempt(request=None):
+    """httpx event hook：同一個 llm span 內第二次以後的請求視為重試"""
+    spans = _active_spans.get()
+    if not spans:
+        return
+    innermost = spans[-1]
+    innermost.http_attempts += 1
+    if innermost.http_attempts > 1:
+        record_retry()
+
+def record_llm_result(result):
+    """從 ChatResult 讀取 token 用量"""
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    record_tokens(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+    return result
+
+def record_llm_chunk(chunk):
+    """串流時 token 用量只出現在最後一個 chunk"""
+    usage = getattr(chunk.message, "usage_metadata", None)
+    if usage:
+        record_tokens(usage.get("input_tokens"), usage.get("output_tokens"))
+    return chunk
@@ -1,30 +1,332 @@
-import yfinance as yf
+import asyncio
+import pandas as pd
+import threading
 import time
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain_groq import ChatGroq
+import httpx
 from .config import SystemConfig
+from .cache import TTLCache
+from .price_store import PriceStore
+from .search_cache import search_cache
+from .research_index import research_index
+from .resilience import call, acall, call_batch
+from .indicators import compute_indicators, price_matrix, technical_summary
+from .telemetry import traced, record_http_attempt
+
+# yfinance、DuckDuckGo 工具與 langchain_groq 各要 0.4~0.5 秒才載入完，
+# 只在第一次真正用到時才 import，只需要設定或快取的路徑 (--help、--serve 啟動前) 不必付這個成本。
+def _yf_ticker(symbol):
+    import yfinance as yf
+    return yf.Ticker(symbol)
+
+def _yf_download(*args, **kwargs):
+    import yfinance as yf
+    return yf.download(*args, **kwargs)
+
+def search_tool():
+    from langchain_community.tools import DuckDuckGoSearchResults
+    return DuckDuckGoSearchResults()
 
 # --- A. 模型工廠 (Model Factory) ---
-def get_model(temperature=0.5, json_mode=False):
+_model_pool = {}
+_model_pool_lock = threading.Lock()
+_http_client = None
+
+def _get_http_client():
+    """所有 ChatGroq 共用一個 keep-alive 的 HTTP 連線池，省下重複的 TLS handshake"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=SystemConfig.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=SystemConfig.LLM_MAX_CONNECTIONS,
+                keepalive_expiry=SystemConfig.LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(SystemConfig.LLM_HTTP_TIMEOUT, connect=10.0),
+            event_hooks={"request": [record_http_attempt]},
+        )
+    return _http_client
+
+def get_model(temperature=0.5, json_mode=False, schema=None, stream=False):
     """
     獲取 LLM 實例。取得 Groq 模型。
+    依 (model, temperature, json_mode, schema, stream) 從池中重複使用，不會每次都重建 client。
+    - json_mode: 要求模型輸出 JSON 物件 (response_format=json_object)
+    - schema: 傳入 Pydantic 類別時回傳 with_structured_output 後的 Runnable
+    - stream: 在 LangGraph 的 messages 串流模式下逐 token 輸出；其餘模型一律整段回傳
+    """
+    key = (SystemConfig.MODEL_NAME, temperature, json_mode, schema, stream)
+    with _model_pool_lock:
+        if key not in _model_pool:
+            from .llm import ThrottledChatGroq
+            from .llm_cache import llm_cache
+            model_kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+            llm = ThrottledChatGroq(
+                model_name=SystemConfig.MODEL_NAME,
+                temperature=temperature,
+                model_kwargs=model_kwargs,
+                http_client=_get_http_client(),
+                cache=llm_cache,
+                disable_streaming=not stream,
+                max_retries=0,   # 重試與斷路由 invoke_chain 的韌性層負責，避免重試次數相乘
+            )
+            _model_pool[key] = llm.with_structured_output(schema) if schema else llm
+        return _model_pool[key]
+
+def invoke_chain(chain, inputs: dict):
+    """統一的 LLM chain 呼叫入口 (限速與快取在模型層處理，重試與斷路在這裡)"""
+    return call("llm", chain.invoke, inputs)
+
+async def ainvoke_chain(chain, inputs: dict):
+    return await acall("llm", chain.ainvoke, inputs)
+
+# --- B. 價格歷史 (Price History Provider) ---
+class PriceHistoryProvider:
+    """
+    每個 ticker 只抓一次最長區間 (5y) 的日 K，
+    所有工具都從同一份 DataFrame 切片取用，避免重複的 history 請求。
+    記憶體中的 DataFrame 存活 PRICE_CACHE_TTL 秒，常駐服務之後分析同一檔時會重新檢查是否有新 K 棒。
+    有設定本機股價庫 (store) 時，只下載最後一筆已存日期之後的 K 棒，其餘從磁碟讀取。
+    """
+    MAX_PERIOD = "5y"
+    # 以「交易日筆數」切片的區間 (對應 yfinance 的 1d / 5d 行為)
+    _ROW_PERIODS = {"1d": 1, "5d": 5}
+    # 以「日曆時間」切片的區間
+    _OFFSET_PERIODS = {
+        "1mo": pd.DateOffset(months=1),
+        "3mo": pd.DateOffset(months=3),
+        "6mo": pd.DateOffset(months=6),
+        "1y": pd.DateOffset(years=1),
+        "2y": pd.DateOffset(years=2),
+        "5y": pd.DateOffset(years=5),
+    }
+
+    def __init__(self, ticker_factory=None, download=None, store=None):
+        # ticker_factory / download 可替換成假的 yf.Ticker / yf.download，方便離線測試
+        self._ticker_factory = ticker_factory or _yf_ticker
+        self._download = download or _yf_download
+        self.store = store
+        self._frames = TTLCache(ttl=SystemConfig.PRICE_CACHE_TTL, maxsize=SystemConfig.PRICE_CACHE_SIZE)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _is_fresh(self, ticker, last_date) -> bool:
+        """
+        本機資料已包含最近一個交易日 (週末/假日不會重複下載)，且最後一筆 K 棒已收盤：
+        寫入時間 (UTC) 已經過了那一天才算收盤，否則可能是盤中價格，只在 PRICE_REFRESH_TTL 內沿用。
+        """
+        if last_date is None or last_date < pd.offsets.BDay().rollback(pd.Timestamp.today().normalize()):
+            return False
+        updated = self.store.updated_at(ticker)
+        if updated is None:
+            return False
+        return (pd.Timestamp(updated, unit="s").normalize() > last_date
+                or time.time() - updated < SystemConfig.PRICE_REFRESH_TTL)
+
+    def _load(self, ticker):
+        """從本機股價庫讀出最後一筆往前 5y 的區間"""
+        last = self.store.last_date(ticker)
+        start = last - self._OFFSET_PERIODS[self.MAX_PERIOD] if last is not None else None
+        return self.store.window(ticker, start)
+
+    def _fetch(self, ticker):
+        """下載單一 ticker：沒有本機資料就抓完整 5y，否則只抓倒數第二筆已存日期之後的部分"""
+        last = self.store.last_date(ticker) if self.store else None
+        if self.store and self._is_fresh(ticker, last):
+            return self._load(ticker)
+        start = (self.store.settled_date(ticker) or last) if last is not None else None
+        def download():
+            stock = self._ticker_factory(ticker)
+            if start is None:
+                return stock.history(period=self.MAX_PERIOD, timeout=SystemConfig.YFINANCE_HTTP_TIMEOUT)
+            return stock.history(start=start.strftime("%Y-%m-%d"), timeout=SystemConfig.YFINANCE_HTTP_TIMEOUT)
+        try:
+            hist = call("yfinance", download)
+        except Exception as e:
+            if last is None:
+                raise
+            # 下載失敗但本機有舊資料：先用到最後一個已存的交易日
+            print(f"   ⚠️ [Price History] {ticker} 更新失敗，改用本機資料 (至 {last.date()}): {e}")
+            return self._load(ticker)
+        return self._persist(ticker, hist)
+
+    def _persist(self, ticker, hist):
+        """把新下載的 K 棒寫進本機股價庫，回傳完整的 5y 區間"""
+        if self.store is None:
+            return hist
+        if self.store.consistent(ticker, hist):
+            self.store.update(ticker, hist)
+            return self._load(ticker)
+
+        # 拆股、除息會讓整段歷史價格重新調整，只追加新 K 棒會接不起來，改為整段重抓；
+        # 下載成功才取代本機資料，失敗時本機那份 (調整一致，只是少了最新幾天) 照常使用
+        def download():
+            return self._ticker_factory(ticker).history(period=self.MAX_PERIOD,
+                                                        timeout=SystemConfig.YFINANCE_HTTP_TIMEOUT)
+        try:
+            full = call("yfinance", download)
+        except Exception as e:
+            print(f"   ⚠️ [Price History] {ticker} 價格已回溯調整但重抓失敗，先用本機資料: {e}")
+            return self._load(ticker)
+        self.store.replace(ticker, full)
+        return self._load(ticker)
+
+    def get(self, ticker: str) -> pd.DataFrame:
+        """回傳完整的 5y 日 K (同一 ticker 在 PRICE_CACHE_TTL 內只會下載一次)"""
+        with self._ticker_lock(ticker):
+            frame = self._frames.get(ticker)
+            if frame is None:
+                frame = self._fetch(ticker)
+                self._frames.set(ticker, frame)
+            return frame
+
+    def prefetch(self, tickers, chunk_size=None) -> int:
+        """
+        批次模式：以 yf.download 一次抓多檔 (每 chunk_size 檔一次呼叫；threads=False 逐檔下載，
+        才不會繞過 yfinance 的並行上限，逾時與限速額度因此依 chunk 大小計算)，
+        結果依 symbol 拆開存入快取。本機股價庫已是最新的 symbol 直接從磁碟讀取，
+        過期的只從最舊的 settled_date 開始下載。回傳實際下載的請求數；
+        沒抓到的 symbol 之後仍會由 get() 個別下載。
+        """
+        chunk_size = chunk_size or SystemConfig.BULK_CHUNK_SIZE
+        missing = [t for t in dict.fromkeys(tickers) if t not in self._frames]
+
+        full, stale = [], {}
+        for ticker in missing:
+            last = self.store.last_date(ticker) if self.store else None
+            if last is None:
+                full.append(ticker)
+            elif self._is_fresh(ticker, last):
+                with self._ticker_lock(ticker):
+                    if ticker not in self._frames:
+                        self._frames.set(ticker, self._load(ticker))
+            else:
+                stale[ticker] = self.store.settled_date(ticker) or last
+
+        requests = 0
+        groups = [(full, {"period": self.MAX_PERIOD})]
+        if stale:
+            groups.append((list(stale), {"start": min(stale.values()).strftime("%Y-%m-%d")}))
+        for group, range_kwargs in groups:
+            for i in range(0, len(group), chunk_size):
+                chunk = group[i:i + chunk_size]
+                def download():
+                    return self._download(chunk, group_by="ticker", auto_adjust=True, threads=False,
+                                          progress=False, timeout=SystemConfig.YFINANCE_HTTP_TIMEOUT, **range_kwargs)
+                data = call_batch("yfinance", len(chunk), download)
+                requests += 1
+                for ticker, frame in self._split(data, chunk).items():
+                    with self._ticker_lock(ticker):
+                        if ticker not in self._frames:
+                            self._frames.set(ticker, self._persist(ticker, frame))
+        return requests
+
+    @staticmethod
+    def _split(data, tickers):
+        """把 yf.download 的寬表 (symbol, 欄位) 拆成每檔一份 DataFrame"""
+        if data is None or data.empty:
+            return {}
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {tickers[0]: data.dropna(how="all")} if len(tickers) == 1 else {}
+        frames = {}
+        for ticker in tickers:
+            if ticker in data.columns.get_level_values(0):
+                frame = data[ticker].dropna(how="all")
+                if not frame.empty:
+                    frames[ticker] = frame
+        return frames
+
+    def cached(self, ticker: str) -> bool:
+        """記憶體中是否已有這檔的日 K (不會觸發下載)"""
+        return ticker in self._frames
+
+    def window(self, ticker: str, period: str) -> pd.DataFrame:
+        """從快取的 DataFrame 切出指定區間 (例如 5d, 3mo, 1y)"""
+        hist = self.get(ticker)
+        if hist.empty:
+            return hist
+        if period in self._ROW_PERIODS:
+            return hist.iloc[-self._ROW_PERIODS[period]:]
+        if period in self._OFFSET_PERIODS:
+            start = hist.index[-1] - self._OFFSET_PERIODS[period]
+            return hist.loc[hist.index >= start]
+        raise ValueError(f"Unsupported period: {period}")
+
+    def clear(self, ticker: str = None):
+        """清除快取 (不指定 ticker 則全部清除)"""
+        if ticker is None:
+            self._frames.clear()
+        else:
+            self._frames.pop(ticker)
+
+price_history = PriceHistoryProvider(
+    store=PriceStore(SystemConfig.PRICE_STORE_DIR) if SystemConfig.PRICE_STORE_ENABLED else None
+)
+
+# --- C. 基本面快照 (Ticker Snapshot Cache) ---
+class TickerSnapshotCache:
     """
-    llm = ChatGroq(
-        model_name=SystemConfig.MODEL_NAME,
-        temperature=temperature
-    )
-    return llm
+    將 Ticker.info 與持股表 (institutional/major holders) 一次抓齊並快取。
+    以 symbol 為 key，過期 (SNAPSHOT_TTL) 或超過容量 (LRU) 才會重新下載。
+    """
+    def __init__(self, ticker_factory=None, ttl=None, maxsize=None):
+        self._ticker_factory = ticker_factory or _yf_ticker
+        self._cache = TTLCache(
+            ttl=ttl if ttl is not None else SystemConfig.SNAPSHOT_TTL,
+            maxsize=maxsize if maxsize is not None else SystemConfig.SNAPSHOT_CACHE_SIZE,
+        )
+        # 不會過期的備份，只在重新下載失敗時使用
+        self._stale = TTLCache(ttl=float("inf"), maxsize=self._cache.maxsize)
+
+    def _download(self, ticker):
+        # Ticker.info 與持股表沒有 timeout 參數，只能靠韌性層的單次嘗試逾時
+        stock = self._ticker_factory(ticker)
+        snapshot = {"info": stock.info or {}}
+        # 持股表 yfinance 常常抓不到，失敗不影響 info
+        for key in ("institutional_holders", "major_holders"):
+            try:
+                snapshot[key] = getattr(stock, key)
+            except Exception:
+                snapshot[key] = None
+        return snapshot
+
+    def _fetch(self, ticker):
+        """下載失敗時沿用過期的舊快照 (沒有舊快照才拋出例外)"""
+        try:
+            snapshot = call("yfinance", self._download, ticker)
+        except Exception as e:
+            snapshot = self._stale.get(ticker)
+            if snapshot is None:
+                raise
+            print(f"   ⚠️ [Snapshot] {ticker} 下載失敗，改用過期的快照: {e}")
+            return snapshot
+        self._stale.set(ticker, snapshot)
+        return snapshot
+
+    def get(self, ticker: str) -> dict:
+        """回傳 {"info", "institutional_holders", "major_holders"}"""
+        snapshot = self._cache.get_or_load(ticker, lambda: self._fetch(ticker))
+        research_index.add_snapshot(ticker, snapshot["info"])
+        return snapshot
+
+    def clear(self):
+        self._cache.clear()
+        self._stale.clear()
+
+ticker_snapshots = TickerSnapshotCache()
+
+# 批次模式一次算好的技術指標摘要 (ticker -> 文字)，與記憶體中的日 K 同樣存活 PRICE_CACHE_TTL
+technical_screens = TTLCache(ttl=SystemConfig.PRICE_CACHE_TTL, maxsize=SystemConfig.PRICE_CACHE_SIZE)
 
-# --- B. 數據工具服務 (Data Services) ---
+# --- D. 數據工具服務 (Data Services) ---
 class ResearchService:
     """
     負責所有外部數據的獲取。
     對應架構圖中的 Infrastructure Layer。
     """
-    @staticmethod
-    def _sleep():
-        time.sleep(0.5)
-
     @staticmethod
     def _format_number(num):
         """將大數字轉換為 B/T (十億/兆) 格式"""
@@ -44,41 +346,64 @@ class ResearchService:
         return f"{num * 100:.2f}%"
 
     # 技術指標工具
+    # 取 1 年資料，讓 SMA50 與 Wilder RSI 有足夠的暖機期
+    TECHNICALS_PERIOD = "1y"
+
+    @staticmethod
+    def screen_technicals(tickers) -> dict:
+        """一次算完整個觀察清單的技術指標，回傳 {ticker: 文字摘要}"""
+        frames = {t: price_history.window(t, ResearchService.TECHNICALS_PERIOD) for t in tickers}
+        frames = {t: df for t, df in frames.items() if not df.empty}
+        if not frames:
+            return {t: "No technical data." for t in tickers}
+
+        close = price_matrix(frames, "Close")
+        indicators = compute_indicators(
+            close.to_numpy(),
+            price_matrix(frames, "High").to_numpy(),
+            price_matrix(frames, "Low").to_numpy(),
+        )
+        return {
+            t: technical_summary(indicators, close.columns.get_loc(t)) if t in frames else "No technical data."
+            for t in tickers
+        }
+
+    @staticmethod
+    def prescreen_technicals(tickers) -> int:
+        """
+        批次模式：股價預先下載後，整個觀察清單做一次陣列運算，結果存進 technical_screens 給各檔取用。
+        交易日曆相同的 ticker 才放在同一個矩陣 (不同交易所的假日會被 ffill 補進其他欄位的均線)，
+        通常整批只有一組。只處理記憶體中已有日 K 的 ticker，不在這裡逐檔下載。回傳算好的檔數。
+        """
+        calendars = {}
+        for ticker in dict.fromkeys(tickers):
+            if price_history.cached(ticker):
+                index = price_history.window(ticker, ResearchService.TECHNICALS_PERIOD).index
+                calendars.setdefault(index.asi8.tobytes(), []).append(ticker)
+        for group in calendars.values():
+            for ticker, summary in ResearchService.screen_technicals(group).items():
+                technical_screens.set(ticker, summary)
+        return sum(len(group) for group in calendars.values())
+
     @staticmethod
+    @traced("tool")
     def get_technicals(ticker: str) -> str:
-        ResearchService._sleep()
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="3mo") # 抓3個月資料
-            if hist.empty: return "No technical data."
-
-            # 1. 計算簡單移動平均 (SMA 50)
-            hist['SMA_50'] = hist['Close'].rolling(window=50).mean()
-            current_price = hist['Close'].iloc[-1]
-            sma_50 = hist['SMA_50'].iloc[-1]
-
-            # 2. 計算 RSI (相對強弱指標)
-            delta = hist['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs)).iloc[-1]
-
-            trend = "Bullish (Above SMA50)" if current_price > sma_50 else "Bearish (Below SMA50)"
-            rsi_signal = "Overbought (>70)" if rsi > 70 else "Oversold (<30)" if rsi < 30 else "Neutral"
-
-            return f"RSI(14): {rsi:.2f} [{rsi_signal}], Price vs SMA50: {trend} (Price: {current_price:.2f}, SMA50: {sma_50:.2f})"
+            summary = technical_screens.get(ticker)
+            if summary is not None:
+                return summary
+            return ResearchService.screen_technicals([ticker])[ticker]
         except Exception as e:
             return f"Technical Error: {str(e)}"
 
     # 機構持股工具
     @staticmethod
+    @traced("tool")
     def get_institutional_holders(ticker: str) -> str:
-        ResearchService._sleep()
         try:
-            stock = yf.Ticker(ticker)
+            snapshot = ticker_snapshots.get(ticker)
             # yfinance 有時會回傳 None，防呆
-            inst_holders = stock.institutional_holders
+            inst_holders = snapshot["institutional_holders"]
             if inst_holders is None or inst_holders.empty:
                 return "Institutional Data Not Available"
 
@@ -87,7 +412,7 @@ class ResearchService:
             holders_str = ", ".join([f"{h['Holder']}" for h in top_holders])
 
             # 抓機構持股比例
-            major_holders = stock.major_holders
+            major_holders = snapshot["major_holders"]
             if major_holders is not None:
                 return f"Top Institutions: {holders_str}"
             return f"Top Holders: {holders_str}"
@@ -97,11 +422,10 @@ class ResearchService:
 
     # 基本面與趨勢工具
     @staticmethod
+    @traced("tool")
     def get_stock_data(ticker: str) -> str:
-        ResearchService._sleep()
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = ticker_snapshots.get(ticker)["info"]
 
             market_cap = ResearchService._format_number(info.get('marketCap'))
             revenue_growth = ResearchService._format_percent(info.get('revenueGrowth'))
@@ -121,7 +445,7 @@ class ResearchService:
 
             fund_str = ", ".join([f"{k}: {v}" for k, v in fundamentals.items() if v is not None])
 
-            hist = stock.history(period="5d")
+            hist = price_history.window(ticker, "5d")
             if not hist.empty:
                 latest = hist.iloc[-1]
                 start = hist.iloc[0]
@@ -135,24 +459,38 @@ class ResearchService:
         except Exception as e:
             return f"Stock Data Error: {str(e)}"
 
+    @staticmethod
+    def _search(query: str, scope=None) -> str:
+        """DuckDuckGo 搜尋 (相同或近似的查詢、或批次內其他 ticker 的相近查詢直接回傳快取結果)"""
+        def fetch():
+            return search_tool().run(query)
+        def load():
+            try:
+                return research_index.fetch_or_reuse(query, lambda: call("ddg", fetch))
+            except Exception:
+                # 搜尋失敗或已斷路：有過期的舊結果就先用
+                stale = search_cache.stale(query)
+                if stale is None:
+                    raise
+                return stale
+        return search_cache.get_or_search(query, load, scope=scope)
+
     # 新聞搜尋工具
     @staticmethod
+    @traced("tool")
     def get_news(ticker: str) -> str:
-        ResearchService._sleep()
         try:
-            search = DuckDuckGoSearchResults()
-            results = search.run(f"{ticker} stock revenue growth earnings analysis")
+            results = ResearchService._search(f"{ticker} stock revenue growth earnings analysis", scope=ticker)
             return results[:2500]
         except Exception as e:
             return f"News Search Error: {str(e)}"
 
     #  身家調查 (Identity Card)
     @staticmethod
+    @traced("tool")
     def get_company_profile(ticker: str) -> str:
-        ResearchService._sleep()
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = ticker_snapshots.get(ticker)["info"]
 
             profile = {
                 "Company Name": info.get('longName', ticker),
@@ -166,24 +504,22 @@ class ResearchService:
 
     # 時光機 (Time Machine / FOMO)
     @staticmethod
+    @traced("tool")
     def get_history_price(ticker: str) -> str:
         """抓取現在、1年前、5年前的股價，供說書人計算報酬率"""
-        ResearchService._sleep()
         try:
-            stock = yf.Ticker(ticker)
-
             # 1. 現在股價
-            current_hist = stock.history(period="1d")
+            current_hist = price_history.window(ticker, "1d")
             if current_hist.empty: return "History Data Error"
             current_price = current_hist['Close'].iloc[-1]
 
             # 2. 1年前股價
-            hist_1y = stock.history(period="1y")
+            hist_1y = price_history.window(ticker, "1y")
             # 如果資料不足1年，就拿最早的那天
             price_1y = hist_1y['Close'].iloc[0] if not hist_1y.empty else current_price
 
             # 3. 5年前股價
-            hist_5y = stock.history(period="5y")
+            hist_5y = price_history.window(ticker, "5y")
             price_5y = hist_5y['Close'].iloc[0] if not hist_5y.empty else current_price
 
             return f"Current Price: {current_price:.2f}, Price 1 Year Ago: {price_1y:.2f}, Price 5 Years Ago: {price_5y:.2f}"
@@ -191,14 +527,42 @@ class ResearchService:
             return "History Data Error"
 
     @staticmethod
-    def search_specific(query: str) -> str:
-        """根據具體查詢語句搜尋網路"""
-        ResearchService._sleep()
+    @traced("tool")
+    def search_specific(query: str, ticker: str = None) -> str:
+        """根據具體查詢語句搜尋網路 (ticker 用來比對同一檔股票的近似查詢)"""
         try:
             print(f"      🕵️‍♂️ [Dynamic Search] 正在搜尋: {query} ...")
-            search = DuckDuckGoSearchResults()
             # 限制回傳長度，避免 Token 爆炸
-            results = search.run(query)
-            return results[:1000]
+            return ResearchService._search(query, scope=ticker)[:1000]
         except Exception as e:
             return f"Search Error: {str(e)}"
+
+    # --- 非同步版本 ---
+    # yfinance / DuckDuckGo 沒有原生 async API，改在執行緒池中執行，避免阻塞 event loop
+    @staticmethod
+    async def aget_technicals(ticker: str) -> str:
+        return await asyncio.to_thread(ResearchService.get_technicals, ticker)
+
+    @staticmethod
+    async def aget_institutional_holders(ticker: str) -> str:
+        return await asyncio.to_thread(ResearchService.get_institutional_holders, ticker)
+
+    @staticmethod
+    async def aget_stock_data(ticker: str) -> str:
+        return await asyncio.to_thread(ResearchService.get_stock_data, ticker)
+
+    @staticmethod
+    async def aget_news(ticker: str) -> str:
+        return await asyncio.to_thread(ResearchService.get_news, ticker)
+
+    @staticmethod
+    async def aget_company_profile(ticker: str) -> str:
+        return await asyncio.to_thread(ResearchService.get_company_profile, ticker)
+
+    @staticmethod
+    async def aget_history_price(ticker: str) -> str:
+        return await asyncio.to_thread(ResearchService.get_history_price, ticker)
+
+    @staticmethod
+    async def asearch_specific(query: str, ticker: str = None) -> str:
+        return await asyncio.to_thread(ResearchService.search_specific, query, ticker)